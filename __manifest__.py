@@ -27,6 +27,14 @@
         'views/team_member_views.xml',
         'views/dashboard_views.xml',
         'views/menu_views.xml',
+        'views/ai_budget_views.xml',
+        'views/ai_model_views.xml',
+        'views/ai_health_views.xml',
+        'views/task_snapshot_views.xml',
+        'views/task_semantic_views.xml',
+        'data/ai_model_data.xml',
+        'data/mail_activity_data.xml',
+        'data/ir_cron_data.xml',
         'data/demo_data.xml',
     ],
     # 'external_dependencies': {
@@ -38,6 +46,7 @@
     'assets': {
         'web.assets_backend': [
             # 'ai_task_manager/static/src/css/dashboard.css',
+            'ai_task_manager/static/src/js/ai_update.js',
         ],
     },
     'installable': True,
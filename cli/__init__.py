@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Commandes en ligne de commande du module (odoo-bin <commande> -d <base> ...).
+
+Odoo découvre chaque commande via le fichier cli/<commande>.py du module.
+"""
+import contextlib
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+
+@contextlib.contextmanager
+def environment(odoo_args):
+    """
+    Ouvre un environnement superutilisateur sur la base passée avec -d.
+    Les options restantes (-c, --db_host, ...) sont celles d'Odoo.
+    La transaction est validée à la sortie du bloc, annulée en cas d'erreur.
+    """
+    config.parse_config(odoo_args)
+    dbname = config['db_name']
+    if isinstance(dbname, (list, tuple)):
+        dbname = dbname[0] if dbname else None
+    if not dbname:
+        raise SystemExit("❌ Précisez la base de données avec -d <base>")
+    registry = Registry(dbname)
+    with registry.cursor() as cr:
+        yield api.Environment(cr, SUPERUSER_ID, {})
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from odoo.cli import Command
+from . import environment
+
+
+def bench_prefetch(env, args):
+    """
+    Parcourt les tâches en lisant name/state, comme une action serveur ou un
+    calcul, avec puis sans le groupe de préchargement 'ai_content'.
+    """
+    Task = env['task.manager.task']
+    ids = Task.search([], limit=args.limit, order='id').ids
+    heavy = [Task._fields[name] for name in sorted(Task._AI_CONTENT_FIELDS)]
+    original = {field: field.prefetch for field in heavy}
+
+    results = []
+    try:
+        for label, prefetch in (("préchargement complet (avant)", True),
+                                ("groupe 'ai_content' (après)", 'ai_content')):
+            for field in heavy:
+                field.prefetch = prefetch
+            env.invalidate_all()
+            queries = env.cr.sql_log_count
+            tracemalloc.start()
+            start = time.perf_counter()
+            for task in Task.browse(ids):
+                task.name, task.state
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((label, elapsed, peak, env.cr.sql_log_count - queries))
+    finally:
+        for field, prefetch in original.items():
+            field.prefetch = prefetch
+        env.invalidate_all()
+
+    print(f"{len(ids)} tâches parcourues (lecture de name et state)")
+    for label, elapsed, peak, queries in results:
+        print(f"  {label:<32} {elapsed:8.3f} s  {peak / 1024 / 1024:9.1f} Mo  {queries:6d} requêtes")
+
+
+def bench_ai_refresh(env, args):
+    """
+    Travail serveur pour afficher le résultat d'une action IA :
+    - avant : rechargement du client puis relecture du formulaire complet
+      (vues + web_read de tous les champs, one2many compris) ;
+    - après : lecture des seuls champs modifiés, poussés par le bus.
+    Le chatter, les abonnés, les activités et le reste du client web
+    rechargés avant ne sont pas comptés.
+    """
+    Task = env['task.manager.task']
+    task = Task.search([], limit=1, order='ai_suggestion_count desc, id')
+    if not task:
+        print("Aucune tâche en base")
+        return
+
+    views = Task.get_views([(False, 'form')])
+    form_fields = views['models'][Task._name]['fields']
+    specification = {
+        name: {'fields': {'display_name': {}}} if Task._fields[name].relational else {}
+        for name in form_fields
+    }
+
+    def measure(call):
+        env.invalidate_all()
+        queries = env.cr.sql_log_count
+        start = time.perf_counter()
+        payload = call()
+        elapsed = time.perf_counter() - start
+        size = len(json.dumps(payload, default=str))
+        return elapsed, env.cr.sql_log_count - queries, size
+
+    runs = {
+        "rechargement complet (avant)": lambda: [
+            Task.get_views([(False, 'form')]),
+            task.web_read(specification),
+        ],
+        "notification bus (après)": lambda: task.read(['description']),
+    }
+    print(f"Tâche {task.id} ({task.ai_suggestion_count} générations IA)")
+    for label, call in runs.items():
+        elapsed, queries, size = measure(call)
+        print(f"  {label:<32} {elapsed * 1000:8.1f} ms  {queries:4d} requêtes  {size / 1024:8.1f} Ko")
+
+
+# Exécuté dans un processus neuf : import d'Odoo, chargement du registre, mémoire
+_STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+from odoo.tools import config
+from odoo.modules.registry import Registry
+config.parse_config(sys.argv[2:])
+imported = time.perf_counter()
+Registry(sys.argv[1])
+loaded = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+try:
+    with open('/proc/self/status') as status:
+        rss = next(int(line.split()[1]) * 1024 for line in status if line.startswith('VmRSS:'))
+except OSError:
+    pass
+print(json.dumps({
+    'import': imported - start,
+    'registry': loaded - imported,
+    'rss': rss,
+    'sdk_loaded': 'google.generativeai' in sys.modules,
+}))
+"""
+
+_SDK_SCRIPT = """
+import json, time
+def rss():
+    with open('/proc/self/status') as status:
+        return next(int(line.split()[1]) * 1024 for line in status if line.startswith('VmRSS:'))
+before, start = rss(), time.perf_counter()
+import google.generativeai
+print(json.dumps({'import': time.perf_counter() - start, 'rss': rss() - before}))
+"""
+
+
+def bench_startup(env, args):
+    """
+    Coût de démarrage d'un worker : chaque mesure lance un processus neuf
+    qui charge le registre de la base (temps et mémoire résidente). Avec
+    --baseline-db (même version d'Odoo, sans le module), la différence
+    donne le coût du module.
+    """
+    databases = [env.cr.dbname] + ([args.baseline_db] if args.baseline_db else [])
+    print(f"Chargement du registre, médiane de {args.repeat} processus")
+    for dbname in databases:
+        runs = []
+        for dummy in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', _STARTUP_SCRIPT, dbname] + args.odoo_args,
+                check=True, capture_output=True, text=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        registry = statistics.median(run['registry'] for run in runs)
+        rss = statistics.median(run['rss'] for run in runs)
+        sdk = "SDK Gemini chargé" if any(run['sdk_loaded'] for run in runs) else "SDK Gemini non chargé"
+        print(f"  {dbname:<24} {registry:8.2f} s  {rss / 1024 / 1024:9.1f} Mo  {sdk}")
+
+    # Coût évité par l'import paresseux du SDK, payé au premier appel réel
+    output = subprocess.run([sys.executable, '-c', _SDK_SCRIPT], capture_output=True, text=True).stdout
+    if output.strip():
+        sdk = json.loads(output.strip().splitlines()[-1])
+        print(f"  {'import du SDK Gemini':<24} {sdk['import']:8.2f} s  {sdk['rss'] / 1024 / 1024:+9.1f} Mo")
+
+
+SCENARIOS = {
+    'prefetch': bench_prefetch,
+    'ai_refresh': bench_ai_refresh,
+    'startup': bench_startup,
+}
+
+
+class TaskBench(Command):
+    """Mesures de performance du module AI Task Manager"""
+    name = 'task_bench'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument('scenario', choices=sorted(SCENARIOS), help="Mesure à lancer")
+        parser.add_argument('--limit', type=int, default=100000, help="Nombre de tâches (défaut : 100000)")
+        parser.add_argument('--baseline-db', help="startup : base de comparaison sans le module")
+        parser.add_argument('--repeat', type=int, default=3, help="startup : processus lancés par base (défaut : 3)")
+        args, odoo_args = parser.parse_known_args(cmdargs)
+        args.odoo_args = odoo_args
+
+        with environment(odoo_args) as env:
+            SCENARIOS[args.scenario](env, args)
+            # Les mesures ne doivent rien laisser en base
+            env.cr.rollback()
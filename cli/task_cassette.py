@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import argparse
+import os
+import sys
+from pathlib import Path
+from odoo.cli import Command
+from . import environment
+
+
+class TaskCassette(Command):
+    """Alimente la cassette de rejeu IA avec les générations réussies de l'historique"""
+    name = 'task_cassette'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument('-o', '--output', help="Fichier cassette (défaut : task_manager.ai_cassette)")
+        parser.add_argument('--limit', type=int, help="Nombre maximum de générations reprises")
+        args, odoo_args = parser.parse_known_args(cmdargs)
+
+        if args.output:
+            os.environ['TASK_MANAGER_AI_CASSETTE'] = args.output
+        with environment(odoo_args) as env:
+            Transport = env['task.ai.transport']
+            count = Transport.seed_cassette_from_history(limit=args.limit)
+            path = Transport._get_cassette_path()
+        print(f"✅ {count} réponses ajoutées à {path}")
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+from odoo.cli import Command
+from . import environment
+
+
+class TaskExport(Command):
+    """Exporte en flux les tâches ou l'historique IA en JSONL ou Parquet"""
+    name = 'task_export'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument('model', choices=['task', 'history'], help="Données à exporter")
+        parser.add_argument('-o', '--output', required=True, help="Fichier de sortie")
+        parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl',
+                            help="Format de sortie (parquet nécessite pyarrow)")
+        parser.add_argument('--fields', help="Colonnes à exporter, séparées par des virgules")
+        parser.add_argument('--since', help="N'exporter que les lignes modifiées après cette date (UTC)")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Reprendre depuis le dernier export et mémoriser la nouvelle marque")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Lignes lues par aller-retour du curseur serveur (défaut : 5000)")
+        args, odoo_args = parser.parse_known_args(cmdargs)
+
+        columns = [name.strip() for name in args.fields.split(',')] if args.fields else None
+        with environment(odoo_args) as env:
+            count, watermark = env['task.manager.export'].export(
+                args.model, args.output, fmt=args.format, columns=columns, since=args.since,
+                batch_size=args.batch_size, incremental=args.incremental,
+            )
+        print(f"✅ {count} lignes exportées vers {args.output} (marque : {watermark or '-'})")
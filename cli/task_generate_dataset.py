@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+import argparse
+import hashlib
+import io
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from odoo.cli import Command
+from odoo.tools import SQL
+from . import environment
+
+# Vocabulaire des titres et descriptions (recherche sémantique réaliste)
+VERBS = ['Corriger', 'Implémenter', 'Tester', 'Documenter', 'Optimiser', 'Refondre',
+         'Migrer', 'Analyser', 'Déployer', 'Concevoir', 'Relire', 'Automatiser']
+OBJECTS = ['la page de connexion', "l'export CSV", 'le tableau de bord', "l'API de facturation",
+           'les notifications email', 'le module de recherche', 'la synchronisation mobile',
+           'les rapports mensuels', 'le formulaire client', "l'import des contacts",
+           'le cache des sessions', 'les droits d\'accès', 'le flux de paiement', 'la page produit']
+DETAILS = ['Les utilisateurs signalent des lenteurs.', 'Prévoir des tests de non-régression.',
+           'Le client attend une démonstration.', 'Bloquant pour la prochaine version.',
+           'Voir le ticket du support.', 'Coordonner avec l\'équipe design.',
+           'Mesurer avant et après la modification.', 'Vérifier la compatibilité mobile.']
+FIRST_NAMES = ['Amine', 'Sara', 'Youssef', 'Léa', 'Karim', 'Inès', 'Hugo', 'Nadia',
+               'Omar', 'Chloé', 'Mehdi', 'Emma', 'Rania', 'Lucas', 'Salma', 'Noah']
+LAST_NAMES = ['Benali', 'Martin', 'El Idrissi', 'Dubois', 'Alaoui', 'Bernard', 'Haddad',
+              'Moreau', 'Tazi', 'Laurent', 'Chraibi', 'Petit', 'Bennani', 'Roux']
+
+# Distributions (valeur, poids)
+ROLES = [('developer', 50), ('tester', 25), ('designer', 15), ('manager', 10)]
+PRIORITIES = [('low', 30), ('medium', 50), ('high', 20)]
+GENERATION_TYPES = [('description', 30), ('subtasks', 25), ('duration', 20), ('priority', 20), ('triage', 5)]
+
+
+def _copy_value(value):
+    """Valeur au format texte de COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class CopyBuffer:
+    """Accumule des lignes et les envoie par COPY tous les `batch` enregistrements"""
+
+    def __init__(self, cr, table, columns, batch):
+        self.cr, self.table, self.columns, self.batch = cr, table, columns, batch
+        self.buffer, self.pending, self.total = io.StringIO(), 0, 0
+
+    def add(self, *values):
+        self.buffer.write('\t'.join(map(_copy_value, values)) + '\n')
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.buffer.seek(0)
+            self.cr.copy_expert(f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN", self.buffer)
+            self.total += self.pending
+            self.buffer, self.pending = io.StringIO(), 0
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    cum_weights = [sum(weights[:i + 1]) for i in range(len(weights))]
+    return lambda: rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def _reserve_ids(cr, table, count):
+    """Réserve un bloc de `count` identifiants consécutifs (base de test : pas d'écriture concurrente)"""
+    cr.execute(SQL(
+        "SELECT setval(pg_get_serial_sequence(%s, 'id'), nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+        table, table, count,
+    ))
+    last_id = cr.fetchone()[0]
+    return last_id - count + 1
+
+
+def generate_members(env, rng, args, now):
+    cr = env.cr
+    first_id = _reserve_ids(cr, 'task_manager_team_member', args.members)
+    role = _weighted(rng, ROLES)
+    copy = CopyBuffer(cr, 'task_manager_team_member', [
+        'id', 'name', 'email', 'role', 'active', 'joining_date', 'daily_capacity_hours',
+        'create_uid', 'create_date', 'write_uid', 'write_date',
+    ], args.batch)
+    members = []
+    for index in range(args.members):
+        member_id = first_id + index
+        member_role = role()
+        copy.add(
+            member_id,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index + 1}",
+            f"membre{index + 1}@example.com",
+            member_role,
+            True,
+            args.today - timedelta(days=rng.randint(0, 1500)),
+            rng.choice([6.0, 7.0, 8.0, 8.0, 8.0]),
+            env.uid, now, env.uid, now,
+        )
+        # Charge très inégale : quelques membres reçoivent beaucoup de tâches
+        members.append((member_id, member_role, rng.paretovariate(1.5)))
+    copy.flush()
+    return members
+
+
+def generate_tasks(env, rng, args, members, now):
+    cr = env.cr
+    first_id = _reserve_ids(cr, 'task_manager_task', args.tasks)
+    user_id = env.ref('base.user_admin').id
+    priority = _weighted(rng, PRIORITIES)
+    generation_type = _weighted(rng, GENERATION_TYPES)
+    model_names = env['task.ai.model'].search([]).mapped('name') or ['gemini-flash-latest']
+    member_cum_weights = []
+    for member in members:
+        member_cum_weights.append((member_cum_weights[-1] if member_cum_weights else 0) + member[2])
+
+    tasks = CopyBuffer(cr, 'task_manager_task', [
+        'id', 'name', 'description', 'priority', 'state', 'deadline', 'estimated_hours',
+        'user_id', 'team_member_id', 'required_role', 'parent_id', 'parent_path',
+        'ai_generated', 'ai_suggestion_count', 'ai_output_stale', 'active',
+        'create_uid', 'create_date', 'write_uid', 'write_date',
+    ], args.batch)
+    history = CopyBuffer(cr, 'task_ai_history', [
+        'task_id', 'generation_type', 'prompt_sent', 'response_received', 'generation_date',
+        'success', 'provider_error', 'error_message', 'tokens_used', 'execution_time', 'model_used', 'prompt_hash',
+        'create_uid', 'create_date', 'write_uid', 'write_date',
+    ], args.batch)
+
+    recent_roots = []
+    for index in range(args.tasks):
+        task_id = first_id + index
+        created = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        age = int((now - created).total_seconds())
+        age_days = age // 86400
+        # Les tâches anciennes sont plus souvent terminées
+        done_ratio = min(0.9, 0.1 + age_days / 300)
+        draw = rng.random()
+        state = 'done' if draw < done_ratio else 'in_progress' if draw < done_ratio + (1 - done_ratio) * 0.4 else 'new'
+        deadline = None
+        if rng.random() < 0.85:
+            deadline = created.date() + timedelta(days=rng.randint(-5, 90))
+        member = None
+        if rng.random() < 0.85:
+            member = rng.choices(members, cum_weights=member_cum_weights)[0]
+
+        parent_id = None
+        if recent_roots and rng.random() < args.subtask_ratio:
+            parent_id = rng.choice(recent_roots)
+        else:
+            recent_roots.append(task_id)
+            del recent_roots[:-1000]
+
+        title = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+        tasks.add(
+            task_id,
+            f"{title} #{index + 1}",
+            ' '.join(rng.sample(DETAILS, rng.randint(1, 3))),
+            priority(),
+            state,
+            deadline,
+            round(min(rng.lognormvariate(1.5, 0.8), 200.0), 1),
+            user_id,
+            member and member[0],
+            member[1] if member and rng.random() < 0.5 else None,
+            parent_id,
+            f"{parent_id}/{task_id}/" if parent_id else f"{task_id}/",
+            bool(parent_id) and rng.random() < 0.5,
+            0,
+            False,
+            True,
+            env.uid, created, env.uid, created + timedelta(seconds=rng.randint(0, age)),
+        )
+
+        # Historique IA à longue traîne : la plupart des tâches en ont peu, quelques-unes beaucoup
+        for dummy in range(min(int(rng.expovariate(1 / args.history)) if args.history else 0, 200)):
+            gtype = generation_type()
+            generated = created + timedelta(seconds=rng.randint(0, age))
+            success = rng.random() < 0.92
+            prompt = f"[{gtype}] {title}"
+            history.add(
+                # Le tri IA est journalisé par lot, sans tâche (comme task.manager.triage)
+                None if gtype == 'triage' else task_id,
+                gtype,
+                prompt,
+                f"Réponse synthétique ({gtype}) pour : {title}" if success else None,
+                generated,
+                success,
+                not success,
+                None if success else "Erreur simulée : délai dépassé",
+                rng.randint(200, 2000) if success else 0,
+                round(rng.lognormvariate(0.5, 0.6), 3),
+                rng.choice(model_names),
+                hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+                env.uid, generated, env.uid, generated,
+            )
+    tasks.flush()
+    history.flush()
+    return first_id, first_id + args.tasks - 1, history.total
+
+
+def recompute(env, args, first_id, last_id, member_ids):
+    """Champs stockés recalculés en requêtes ensemblistes, sans passer par l'ORM"""
+    cr = env.cr
+    cr.execute(SQL(
+        """
+        UPDATE task_manager_task
+           SET is_overdue = (deadline IS NOT NULL AND deadline < %s AND state != 'done')
+         WHERE id BETWEEN %s AND %s
+        """,
+        args.today, first_id, last_id,
+    ))
+    cr.execute(SQL(
+        """
+        UPDATE task_manager_task t
+           SET ai_suggestion_count = h.count
+          FROM (SELECT task_id, COUNT(*) AS count
+                  FROM task_ai_history
+                 WHERE success AND task_id BETWEEN %s AND %s
+                 GROUP BY task_id) h
+         WHERE t.id = h.task_id
+        """,
+        first_id, last_id,
+    ))
+    cr.execute(SQL(
+        """
+        UPDATE task_manager_team_member m
+           SET task_count = a.total,
+               task_new_count = a.new,
+               task_in_progress_count = a.in_progress,
+               task_done_count = a.done,
+               open_task_count = a.new + a.in_progress,
+               open_estimated_hours = a.open_hours,
+               completion_rate = CASE WHEN a.total > 0 THEN 100.0 * a.done / a.total ELSE 0 END
+          FROM (SELECT m.id,
+                       COUNT(t.id) AS total,
+                       COUNT(t.id) FILTER (WHERE t.state = 'new') AS new,
+                       COUNT(t.id) FILTER (WHERE t.state = 'in_progress') AS in_progress,
+                       COUNT(t.id) FILTER (WHERE t.state = 'done') AS done,
+                       COALESCE(SUM(t.estimated_hours) FILTER (WHERE t.state != 'done'), 0) AS open_hours
+                  FROM task_manager_team_member m
+                  LEFT JOIN task_manager_task t ON t.team_member_id = m.id AND t.active
+                 WHERE m.id = ANY(%s)
+                 GROUP BY m.id) a
+         WHERE m.id = a.id
+        """,
+        member_ids,
+    ))
+    # Prévisions et chemin critique (forecast_*, is_critical) : recalcul complet,
+    # à la date du jour comme le cron quotidien
+    env['task.manager.scheduler'].recompute_schedule()
+    env['task.manager.task.report']._refresh_full()
+    for table in ('task_manager_team_member', 'task_manager_task', 'task_ai_history'):
+        cr.execute(SQL("ANALYZE %s", SQL.identifier(table)))
+    env.invalidate_all()
+
+
+class TaskGenerateDataset(Command):
+    """Génère un jeu de données synthétique (membres, tâches, historique IA) chargé par COPY"""
+    name = 'task_generate_dataset'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument('--tasks', type=int, default=100000, help="Nombre de tâches (défaut : 100000)")
+        parser.add_argument('--members', type=int, help="Nombre de membres (défaut : une pour 200 tâches)")
+        parser.add_argument('--history', type=float, default=3.0,
+                            help="Générations IA par tâche en moyenne (défaut : 3)")
+        parser.add_argument('--subtask-ratio', type=float, default=0.2,
+                            help="Proportion de sous-tâches (défaut : 0.2)")
+        parser.add_argument('--seed', type=int, default=42, help="Graine du générateur (défaut : 42)")
+        parser.add_argument('--today', type=date.fromisoformat, default=date.today(),
+                            help="Date de référence AAAA-MM-JJ : même graine et même date, mêmes données")
+        parser.add_argument('--batch', type=int, default=50000, help="Lignes par COPY (défaut : 50000)")
+        args, odoo_args = parser.parse_known_args(cmdargs)
+        args.members = args.members or max(1, args.tasks // 200)
+
+        rng = random.Random(args.seed)
+        now = datetime.combine(args.today, datetime.min.time()) + timedelta(hours=12)
+        with environment(odoo_args) as env:
+            start = time.perf_counter()
+            members = generate_members(env, rng, args, now)
+            print(f"✅ {len(members)} membres chargés ({time.perf_counter() - start:.1f} s)")
+
+            start = time.perf_counter()
+            first_id, last_id, history_count = generate_tasks(env, rng, args, members, now)
+            print(f"✅ {args.tasks} tâches et {history_count} générations IA chargées "
+                  f"({time.perf_counter() - start:.1f} s)")
+
+            start = time.perf_counter()
+            recompute(env, args, first_id, last_id, [member[0] for member in members])
+            print(f"✅ Champs calculés et statistiques mis à jour ({time.perf_counter() - start:.1f} s)")
+        print("ℹ️  Index sémantique : odoo-bin task_semantic_index -d <base>")
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import argparse
+import http.cookiejar
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from odoo.cli import Command
+
+# Actions lancées, chacune sur une tâche différente à chaque requête
+ACTIONS = {
+    'description': ['action_generate_ai_description'],
+    'all_ai': ['action_generate_all_ai_suggestions'],
+    'state': ['action_start_task', 'action_complete_task', 'action_reset_task'],
+}
+
+# Paramètres système modifiés le temps du test, puis restaurés
+_TEST_PARAMS = ('task_manager.ai_transport', 'task_manager.ai_replay_latency',
+                'task_manager.ai_replay_error_rate', 'task_manager.ai_cassette',
+                'task_manager.ai_daily_limit', 'task_manager.ai_single_flight_reuse')
+
+_rpc_ids = itertools.count(1)
+
+
+class RpcError(Exception):
+    pass
+
+
+class Client:
+    """Session JSON-RPC (un cookie de session par client)"""
+
+    def __init__(self, url, db, login, password, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.rpc('/web/session/authenticate', {'db': db, 'login': login, 'password': password})
+
+    def rpc(self, path, params):
+        body = json.dumps({'jsonrpc': '2.0', 'method': 'call', 'params': params, 'id': next(_rpc_ids)})
+        request = urllib.request.Request(
+            self.url + path, body.encode(), {'Content-Type': 'application/json'}
+        )
+        with self.opener.open(request, timeout=self.timeout) as response:
+            payload = json.load(response)
+        if payload.get('error'):
+            error = payload['error']
+            raise RpcError((error.get('data') or {}).get('message') or error.get('message'))
+        return payload['result']
+
+    def call(self, model, method, *args, **kwargs):
+        return self.rpc(f'/web/dataset/call_kw/{model}/{method}', {
+            'model': model, 'method': method, 'args': list(args), 'kwargs': kwargs,
+        })
+
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche (values triées)"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class TaskLoadtest(Command):
+    """Test de charge des actions IA et d'état sur une instance Odoo démarrée (JSON-RPC)"""
+    name = 'task_loadtest'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument('-d', '--database', required=True, help="Base de données")
+        parser.add_argument('--url', default='http://localhost:8069', help="URL d'Odoo (défaut : http://localhost:8069)")
+        parser.add_argument('--login', default='admin')
+        parser.add_argument('--password', default='admin')
+        parser.add_argument('--actions', default=','.join(ACTIONS),
+                            help=f"Actions testées parmi {', '.join(ACTIONS)} (défaut : toutes)")
+        parser.add_argument('--concurrency', default='1,2,4,8,16,32',
+                            help="Niveaux de concurrence (défaut : 1,2,4,8,16,32)")
+        parser.add_argument('--requests', type=int, default=200, help="Requêtes par action et par niveau (défaut : 200)")
+        parser.add_argument('--latency', default='200',
+                            help="Latence simulée du fournisseur en ms, ou 'recorded' (défaut : 200)")
+        parser.add_argument('--error-rate', default='0', help="Proportion d'erreurs simulées du fournisseur")
+        parser.add_argument('--cassette', help="Cassette de rejeu côté serveur (défaut : celle configurée)")
+        parser.add_argument('--timeout', type=float, default=120.0, help="Délai maximal d'une requête (s)")
+        parser.add_argument('--json', help="Écrit les résultats dans ce fichier")
+        args = parser.parse_args(cmdargs)
+
+        actions = args.actions.split(',')
+        unknown = set(actions) - set(ACTIONS)
+        if unknown:
+            raise SystemExit(f"❌ Actions inconnues : {', '.join(sorted(unknown))}")
+        levels = [int(level) for level in args.concurrency.split(',')]
+
+        def connect():
+            return Client(args.url, args.database, args.login, args.password, args.timeout)
+
+        admin = connect()
+        task_ids = admin.call('task.manager.task', 'search', [], limit=max(args.requests, 1), order='id')
+        if not task_ids:
+            raise SystemExit("❌ Aucune tâche en base")
+
+        # Fournisseur IA simulé : rejeu de la cassette côté serveur
+        Params = 'ir.config_parameter'
+        saved = {key: admin.call(Params, 'get_param', key) for key in _TEST_PARAMS}
+        overrides = {
+            'task_manager.ai_transport': 'replay',
+            'task_manager.ai_replay_latency': args.latency,
+            'task_manager.ai_replay_error_rate': args.error_rate,
+            'task_manager.ai_daily_limit': str(10 ** 9),
+            # Chaque appel doit atteindre le fournisseur simulé
+            'task_manager.ai_single_flight_reuse': 'False',
+        }
+        if args.cassette:
+            overrides['task_manager.ai_cassette'] = args.cassette
+
+        results = []
+        try:
+            for key, value in overrides.items():
+                admin.call(Params, 'set_param', key, value)
+            for action in actions:
+                for level in levels:
+                    for result in self._run_level(connect, action, level, args.requests, task_ids):
+                        self._print(result)
+                        results.append(result)
+        finally:
+            for key, value in saved.items():
+                admin.call(Params, 'set_param', key, value or False)
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+
+    def _run_level(self, connect, action, level, count, task_ids):
+        """Lance `count` séquences de l'action sur `level` sessions ; un résultat par méthode"""
+        local = threading.local()
+        latencies = defaultdict(list)
+        errors = defaultdict(lambda: defaultdict(int))
+        lock = threading.Lock()
+
+        def job(index):
+            if not hasattr(local, 'client'):
+                local.client = connect()
+            task_id = task_ids[index % len(task_ids)]
+            for method in ACTIONS[action]:
+                start = time.perf_counter()
+                try:
+                    local.client.call('task.manager.task', method, [task_id])
+                except Exception as e:
+                    message = str(e).splitlines()[0][:80] if str(e) else type(e).__name__
+                    with lock:
+                        errors[method][message] += 1
+                    return
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[method].append(elapsed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            list(pool.map(job, range(count)))
+        wall = time.perf_counter() - start
+
+        results = []
+        for method in ACTIONS[action]:
+            values = sorted(latencies[method])
+            failed = sum(errors[method].values())
+            calls = len(values) + failed
+            results.append({
+                'action': method,
+                'concurrency': level,
+                'calls': calls,
+                'ok': len(values),
+                'error_rate': failed / calls if calls else 0.0,
+                'throughput': len(values) / wall if wall else 0.0,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'errors': dict(errors[method]),
+            })
+        return results
+
+    @staticmethod
+    def _print(result):
+        print(
+            f"{result['action']:<36} c={result['concurrency']:<4} "
+            f"{result['throughput']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+            f"erreurs {result['error_rate']:6.1%}"
+        )
+        for message, count in sorted(result['errors'].items(), key=lambda item: -item[1])[:3]:
+            print(f"    {count:5d} × {message}")
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+from odoo.cli import Command
+from . import environment
+
+
+class TaskSemanticIndex(Command):
+    """Reconstruit l'index sémantique des tâches"""
+    name = 'task_semantic_index'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help="Tâches lues et plongées par lot (défaut : 2000)",
+        )
+        args, odoo_args = parser.parse_known_args(cmdargs)
+
+        with environment(odoo_args) as env:
+            count = env['task.manager.semantic.index'].rebuild(batch_size=args.batch_size)
+        print(f"✅ {count} tâches indexées")
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+from odoo.cli import Command
+from . import environment
+
+
+class TaskSnapshotBackfill(Command):
+    """Reconstruit les instantanés quotidiens des tâches depuis le suivi des messages"""
+    name = 'task_snapshot_backfill'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__,
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help="Lignes lues par aller-retour du curseur serveur (défaut : 10000)",
+        )
+        args, odoo_args = parser.parse_known_args(cmdargs)
+
+        with environment(odoo_args) as env:
+            written = env['task.manager.task.snapshot']._backfill(batch_size=args.batch_size)
+        print(f"✅ {written} lignes d'instantanés écrites")
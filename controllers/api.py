@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import base64
+import binascii
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from werkzeug.http import http_date
+from odoo import http
+from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.http import request
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Ressources exposées -> modèle Odoo
+API_MODELS = {
+    'tasks': 'task.manager.task',
+    'team_members': 'task.manager.team.member',
+}
+
+# Champs tenus à jour en SQL sans toucher write_date : une synchronisation
+# par curseur sur write_date ne verrait jamais leurs changements
+UNTRACKED_FIELDS = {
+    'tasks': {'ai_suggestion_count', 'forecast_start', 'forecast_finish',
+              'forecast_slack', 'is_critical', 'is_overdue'},
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+MAX_UPSERT = 5000
+
+
+class TaskManagerApi(http.Controller):
+    """
+    API JSON des tâches et des membres pour les outils de synchronisation.
+
+    - GET /task_manager/api/<ressource>?fields=a,b&limit=500&cursor=...
+      pagination par curseur sur (write_date, id) (index dédié, coût constant
+      quelle que soit la page), projection explicite des champs, ETag et
+      Last-Modified : une page inchangée répond 304 sans lire les champs.
+    - POST /task_manager/api/tasks/upsert {"records": [{"id": 12, ...}, {...}]}
+      création / mise à jour en une transaction (au plus 5000 lignes).
+
+    Authentification par clé API (Authorization: Bearer <clé>). L'écriture
+    exige un corps application/json : un formulaire d'un autre site ne peut
+    pas l'envoyer sans requête préalable CORS, d'où l'absence de jeton CSRF.
+    """
+
+    # ========== OUTILS ==========
+
+    @staticmethod
+    def _error(message, status=400):
+        request.env.cr.rollback()
+        return request.make_json_response({'error': message}, status=status)
+
+    @staticmethod
+    def _encode_cursor(write_date, record_id):
+        return base64.urlsafe_b64encode(f"{write_date.isoformat()}|{record_id}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """(write_date, id) depuis le curseur opaque, ValueError si invalide"""
+        try:
+            write_date, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(write_date), int(record_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError("curseur invalide")
+
+    @staticmethod
+    def _default_fields(Model, untracked):
+        """Champs stockés légers : ni contenu IA, ni binaires, ni x2many, ni champs non suivis"""
+        heavy = getattr(Model, '_AI_CONTENT_FIELDS', set())
+        return [
+            name for name, field in Model._fields.items()
+            if field.store and field.column_type and name not in heavy | untracked
+            and field.type not in ('binary', 'html')
+        ]
+
+    # ========== LECTURE ==========
+
+    @http.route('/task_manager/api/<string:resource>', type='http', auth='bearer', methods=['GET'], readonly=True)
+    def api_list(self, resource, fields=None, limit=None, cursor=None, **kwargs):
+        if resource not in API_MODELS:
+            return self._error(f"ressource inconnue : {resource}", status=404)
+        Model = request.env[API_MODELS[resource]]
+
+        try:
+            limit = min(int(limit or DEFAULT_LIMIT), MAX_LIMIT)
+            after = self._decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return self._error(str(e))
+        if limit < 1:
+            return self._error("'limit' doit être un entier positif")
+        untracked = UNTRACKED_FIELDS.get(resource, set())
+        field_names = fields.split(',') if fields else self._default_fields(Model, untracked)
+        unknown = set(field_names) - set(Model.fields_get(attributes=['type']))
+        if unknown:
+            return self._error(f"champs inconnus : {', '.join(sorted(unknown))}")
+        if untracked.intersection(field_names):
+            return self._error(
+                f"champs non synchronisables (modifiés sans write_date) : "
+                f"{', '.join(sorted(untracked.intersection(field_names)))}"
+            )
+
+        # Une requête indexée (règles d'accès comprises) pour les clés de la page :
+        # les champs ne sont lus que si la page a changé. La comparaison de
+        # lignes (write_date, id) > curseur garde les microsecondes de write_date.
+        query = Model._search([])
+        write_date = SQL.identifier(Model._table, 'write_date')
+        record_id = SQL.identifier(Model._table, 'id')
+        if after:
+            query.add_where(SQL("(%s, %s) > (%s, %s)", write_date, record_id, after[0], after[1]))
+        query.order = SQL("%s, %s", write_date, record_id)
+        query.limit = limit + 1
+        request.env.cr.execute(query.select(record_id, write_date))
+        keys = request.env.cr.fetchall()
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+
+        etag = hashlib.sha1(json.dumps([resource, field_names, keys], default=str).encode()).hexdigest()
+        last_modified = max((key[1] for key in keys), default=None)
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+        if last_modified:
+            headers.append(('Last-Modified', http_date(last_modified)))
+
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            not_modified = httprequest.if_none_match.contains(etag)
+        else:
+            since = httprequest.if_modified_since
+            not_modified = bool(last_modified and since and
+                                last_modified.replace(microsecond=0) <= since.replace(tzinfo=None))
+        if not_modified:
+            return request.make_response('', headers=headers, status=304)
+
+        payload = {
+            'records': Model.browse([key[0] for key in keys]).read(field_names, load=None),
+            'next_cursor': self._encode_cursor(keys[-1][1], keys[-1][0]) if has_more else None,
+        }
+        return request.make_response(
+            json.dumps(payload, default=str, ensure_ascii=False),
+            headers=headers + [('Content-Type', 'application/json; charset=utf-8')],
+        )
+
+    # ========== ÉCRITURE ==========
+
+    @http.route('/task_manager/api/tasks/upsert', type='http', auth='bearer', methods=['POST'], csrf=False)
+    def api_upsert_tasks(self, **kwargs):
+        if request.httprequest.mimetype != 'application/json':
+            return self._error("Content-Type application/json attendu", status=415)
+        try:
+            records = json.loads(request.httprequest.get_data(as_text=True) or '{}').get('records')
+        except (ValueError, AttributeError):
+            return self._error("corps JSON invalide : {\"records\": [...]} attendu")
+        if not isinstance(records, list) or not all(isinstance(values, dict) for values in records):
+            return self._error("'records' doit être une liste d'objets")
+        if len(records) > MAX_UPSERT:
+            return self._error(f"au plus {MAX_UPSERT} lignes par requête", status=413)
+
+        Task = request.env['task.manager.task']
+        writable = {
+            name for name, description in Task.fields_get(attributes=['readonly']).items()
+            if not description.get('readonly')
+        }
+        to_create, to_update = [], defaultdict(list)
+        for values in records:
+            values = dict(values)
+            record_id = values.pop('id', None)
+            if record_id is not None and (not isinstance(record_id, int) or isinstance(record_id, bool)):
+                return self._error(f"identifiant invalide : {record_id!r}")
+            unknown = set(values) - writable
+            if unknown:
+                return self._error(f"champs non modifiables : {', '.join(sorted(unknown))}")
+            if record_id:
+                # Les mises à jour identiques sont regroupées en une écriture
+                to_update[json.dumps(values, sort_keys=True)].append(record_id)
+            else:
+                to_create.append(values)
+
+        # Une seule transaction : la moindre erreur annule tout le lot
+        try:
+            updated = []
+            for values, ids in to_update.items():
+                tasks = Task.browse(ids).exists()
+                missing = set(ids) - set(tasks.ids)
+                if missing:
+                    return self._error(f"tâches introuvables : {', '.join(map(str, sorted(missing)))}", status=404)
+                tasks.write(json.loads(values))
+                updated += tasks.ids
+            created = Task.create(to_create).ids if to_create else []
+            request.env.flush_all()
+        except (AccessError, UserError, ValidationError, ValueError) as e:
+            return self._error(str(e), status=403 if isinstance(e, AccessError) else 400)
+
+        _logger.info(f"API : {len(created)} tâches créées, {len(updated)} mises à jour")
+        return request.make_json_response({'created': created, 'updated': updated})
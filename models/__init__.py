@@ -1,4 +1,16 @@
 from . import task
 from . import team_member
 from . import ai_config
-from . import task_ai_history
\ No newline at end of file
+from . import task_ai_history
+from . import ai_budget
+from . import task_assignment
+from . import task_schedule
+from . import task_report
+from . import task_snapshot
+from . import task_export
+from . import ai_transport
+from . import ai_model
+from . import ai_health
+from . import task_reminder
+from . import task_semantic
+from . import task_triage
\ No newline at end of file
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import logging
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskAIBudget(models.Model):
+    """Budget quotidien de tokens IA par utilisateur ou par rôle d'équipe"""
+    _name = 'task.ai.budget'
+    _description = 'Budget de Tokens IA'
+    _order = 'scope, id'
+
+    # ========== CHAMPS DE BASE ==========
+
+    name = fields.Char(
+        string='Nom',
+        compute='_compute_name',
+        store=True
+    )
+
+    scope = fields.Selection([
+        ('user', 'Utilisateur'),
+        ('role', 'Rôle d\'équipe'),
+    ], string='Portée', required=True, default='user')
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Utilisateur',
+        ondelete='cascade',
+        help="Utilisateur concerné (portée Utilisateur)"
+    )
+
+    role = fields.Selection(
+        selection=lambda self: self.env['task.manager.team.member']._fields['role'].selection,
+        string='Rôle',
+        help="Rôle des membres d'équipe concernés (portée Rôle)"
+    )
+
+    daily_token_limit = fields.Integer(
+        string='Limite quotidienne (tokens)',
+        required=True,
+        default=50000,
+        help="Seuil dur : au-delà, les appels IA sont refusés"
+    )
+
+    soft_threshold = fields.Float(
+        string='Seuil d\'alerte (%)',
+        default=80.0,
+        help="Pourcentage de la limite à partir duquel l'utilisateur est averti"
+    )
+
+    active = fields.Boolean(default=True)
+
+    # ========== COMPTEURS (mis à jour à chaque appel) ==========
+
+    usage_date = fields.Date(
+        string='Jour de consommation',
+        readonly=True
+    )
+
+    tokens_used = fields.Integer(
+        string='Tokens consommés',
+        readonly=True,
+        help="Tokens consommés le jour indiqué"
+    )
+
+    calls_count = fields.Integer(
+        string='Appels',
+        readonly=True
+    )
+
+    tokens_used_today = fields.Integer(
+        string='Tokens aujourd\'hui',
+        compute='_compute_usage_today'
+    )
+
+    usage_rate = fields.Float(
+        string='Consommation (%)',
+        compute='_compute_usage_today'
+    )
+
+    # Une seule règle active par utilisateur et par rôle
+    _user_uniq = models.UniqueIndex("(user_id) WHERE scope = 'user' AND active")
+    _role_uniq = models.UniqueIndex("(role) WHERE scope = 'role' AND active")
+
+    # ========== MÉTHODES DE CALCUL ==========
+
+    @api.depends('scope', 'user_id', 'role')
+    def _compute_name(self):
+        roles = dict(self._fields['role']._description_selection(self.env))
+        for budget in self:
+            if budget.scope == 'user':
+                budget.name = f"Utilisateur : {budget.user_id.name or '-'}"
+            else:
+                budget.name = f"Rôle : {roles.get(budget.role, '-')}"
+
+    @api.depends('usage_date', 'tokens_used', 'daily_token_limit')
+    def _compute_usage_today(self):
+        today = fields.Date.context_today(self)
+        for budget in self:
+            used = budget.tokens_used if budget.usage_date == today else 0
+            budget.tokens_used_today = used
+            budget.usage_rate = used / budget.daily_token_limit * 100 if budget.daily_token_limit else 0.0
+
+    # ========== CONTRAINTES ==========
+
+    @api.constrains('scope', 'user_id', 'role')
+    def _check_scope(self):
+        for budget in self:
+            if budget.scope == 'user' and not budget.user_id:
+                raise ValidationError("Un budget utilisateur doit préciser l'utilisateur.")
+            if budget.scope == 'role' and not budget.role:
+                raise ValidationError("Un budget de rôle doit préciser le rôle.")
+
+    @api.constrains('daily_token_limit', 'soft_threshold')
+    def _check_limits(self):
+        for budget in self:
+            # Une limite nulle bloquerait tout appel : pour ne plus limiter, archiver le budget
+            if budget.daily_token_limit <= 0:
+                raise ValidationError("La limite quotidienne doit être strictement positive.")
+            if not 0 <= budget.soft_threshold <= 100:
+                raise ValidationError("Le seuil d'alerte doit être compris entre 0 et 100 %.")
+
+    # ========== CONTRÔLE ET CONSOMMATION ==========
+
+    @api.model
+    def _get_applicable_budgets(self, user=None):
+        """
+        Retourne les budgets qui s'appliquent à l'utilisateur :
+        son budget personnel et celui du rôle de son membre d'équipe.
+        Deux recherches indexées, aucune lecture de l'historique.
+        """
+        user = user or self.env.user
+        member = self.env['task.manager.team.member'].sudo().search(
+            [('user_id', '=', user.id)], limit=1
+        )
+        domain = [('scope', '=', 'user'), ('user_id', '=', user.id)]
+        if member.role:
+            domain = ['|', '&', ('scope', '=', 'role'), ('role', '=', member.role)] + ['&'] + domain
+        return self.sudo().search(domain)
+
+    @api.model
+    def check_budget(self, estimated_tokens=0, user=None):
+        """
+        Vérifie les budgets avant un appel IA à partir des compteurs précalculés.
+        Lève une UserError si un seuil dur serait dépassé, avertit l'utilisateur
+        si un seuil d'alerte est atteint. Retourne les budgets concernés.
+        """
+        budgets = self._get_applicable_budgets(user)
+        for budget in budgets:
+            used = budget.tokens_used_today
+            limit = budget.daily_token_limit
+            if used + estimated_tokens > limit:
+                raise UserError(
+                    f"❌ Budget IA épuisé ({budget.name}) !\n\n"
+                    f"Vous avez utilisé {used}/{limit} tokens aujourd'hui.\n"
+                    f"Le budget sera réinitialisé demain."
+                )
+            if used >= limit * budget.soft_threshold / 100:
+                _logger.warning(f"Budget IA {budget.name} : {used}/{limit} tokens consommés")
+                self.env.user._bus_send('simple_notification', {
+                    'type': 'warning',
+                    'title': '⚠️ Budget IA bientôt épuisé',
+                    'message': f'{budget.name} : {used}/{limit} tokens consommés aujourd\'hui.',
+                })
+        return budgets
+
+    def _consume(self, tokens):
+        """
+        Incrémente les compteurs de façon atomique, en repartant de zéro
+        lorsque le jour de consommation change.
+        """
+        if not self:
+            return
+        today = fields.Date.context_today(self)
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_ai_budget
+               SET tokens_used = CASE WHEN usage_date = %(today)s
+                                      THEN tokens_used + %(tokens)s ELSE %(tokens)s END,
+                   calls_count = CASE WHEN usage_date = %(today)s
+                                      THEN calls_count + 1 ELSE 1 END,
+                   usage_date = %(today)s
+             WHERE id = ANY(%(ids)s)
+            """,
+            today=today, tokens=int(tokens or 0), ids=self.ids,
+        ))
+        self.invalidate_recordset(['usage_date', 'tokens_used', 'calls_count'])
+
+    @api.model
+    def _cron_reset_daily_usage(self):
+        """
+        Remet à zéro les compteurs des jours passés : le rapport de consommation
+        agrège tokens_used, qui ne repart de zéro qu'au premier appel du jour.
+        """
+        today = fields.Date.context_today(self)
+        self.flush_model(['usage_date', 'tokens_used', 'calls_count'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_ai_budget
+               SET tokens_used = 0, calls_count = 0, usage_date = NULL
+             WHERE usage_date < %s
+            """,
+            today,
+        ))
+        if self.env.cr.rowcount:
+            self.invalidate_model(['usage_date', 'tokens_used', 'calls_count'])
+        return True
+
+    def action_reset_usage(self):
+        """Remet à zéro les compteurs du jour"""
+        self.write({'tokens_used': 0, 'calls_count': 0, 'usage_date': False})
+        return True
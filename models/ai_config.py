@@ -92,9 +92,11 @@ class AIConfig(models.TransientModel):
     def get_config(self):
         """Retourne la configuration complète de l'IA"""
         IrConfigParam = self.env['ir.config_parameter'].sudo()
+        # Le rejeu d'une cassette ne nécessite pas de clé API
+        replay = self.env['task.ai.transport']._get_mode() == 'replay'
         
         return {
-            'api_key': self.get_api_key(),
+            'api_key': False if replay else self.get_api_key(),
             'model': IrConfigParam.get_param('task_manager.ai_model', 'claude-sonnet-4-20250514'),
             'temperature': float(IrConfigParam.get_param('task_manager.ai_temperature', '0.7')),
             'max_tokens': int(IrConfigParam.get_param('task_manager.ai_max_tokens', '1000')),
@@ -104,46 +106,11 @@ class AIConfig(models.TransientModel):
     
     @api.model
     def test_connection(self):
-        """Test la connexion à l'API Claude"""
-        try:
-            # import anthropic
-            api_key = self.get_api_key()
-            
-            # client = anthropic.Anthropic(api_key=api_key)
-            
-            # Test simple
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=50,
-                messages=[{
-                    "role": "user",
-                    "content": "Réponds juste : OK"
-                }]
-            )
-            
-            if response.content[0].text:
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': '✅ Connexion réussie !',
-                        'message': 'L\'API Claude fonctionne correctement.',
-                        'type': 'success',
-                        'sticky': False,
-                    }
-                }
-            
-        except Exception as e:
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': '❌ Erreur de connexion',
-                    'message': f'Impossible de se connecter à l\'API : {str(e)}',
-                    'type': 'danger',
-                    'sticky': True,
-                }
-            }
+        """
+        Vérifie les fournisseurs IA sans bloquer la requête : les sondes de
+        santé sont lancées en arrière-plan et l'état connu est affiché
+        """
+        return self.env['task.ai.model'].action_check_health()
     
     @api.model
     def check_daily_limit(self):
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Requête minimale envoyée à chaque sonde
+PROBE_PROMPT = "Réponds juste : OK"
+
+HEALTH_STATES = [
+    ('unknown', 'Inconnu'),
+    ('healthy', 'Disponible'),
+    ('degraded', 'Dégradé'),
+    ('down', 'En panne'),
+]
+
+
+class TaskAIProviderHealth(models.Model):
+    """
+    Sondes de santé des modèles IA (série temporelle).
+
+    Le cron envoie périodiquement une requête minimale à chaque modèle actif
+    et enregistre sa latence et sa disponibilité. L'état qui en découle
+    (task.ai.model.health_state) est lu par le routeur : un modèle en panne
+    est écarté, un modèle dégradé n'est choisi qu'à défaut d'un modèle sain.
+    """
+    _name = 'task.ai.provider.health'
+    _description = 'Santé des fournisseurs IA'
+    _order = 'probe_date desc, id desc'
+
+    model_id = fields.Many2one(
+        'task.ai.model',
+        string='Modèle',
+        required=True,
+        ondelete='cascade'
+    )
+
+    probe_date = fields.Datetime(
+        string='Date de la sonde',
+        default=fields.Datetime.now,
+        required=True
+    )
+
+    success = fields.Boolean(string='Succès')
+
+    latency = fields.Float(string='Latence (s)', digits=(16, 3))
+
+    error_message = fields.Char(string='Erreur')
+
+    # Dernières sondes d'un modèle et statistiques de la fenêtre
+    _model_probe_date_idx = models.Index("(model_id, probe_date DESC, id DESC)")
+
+    # ========== SONDES ==========
+
+    @api.model
+    def _cron_probe(self):
+        transport = self.env['task.ai.transport']
+        # Le rejeu d'une cassette n'appelle aucun fournisseur : rien à sonder
+        if transport._get_mode() == 'replay':
+            return True
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        timeout = float(IrConfigParam.get_param('task_manager.ai_health_timeout', '10'))
+        retention = int(IrConfigParam.get_param('task_manager.ai_health_retention', '7'))
+        # Sans clé ni SDK, aucun modèle n'est joignable : ce n'est pas une panne
+        # des fournisseurs, les états restent inchangés (inconnus au départ)
+        try:
+            api_key = self.env['task.ai.config'].get_api_key()
+            transport._import_sdk()
+        except UserError as e:
+            _logger.warning(f"Santé IA : sondes ignorées, configuration incomplète ({e})")
+            return True
+
+        ai_models = self.env['task.ai.model'].search([])
+        probes = []
+        for ai_model in ai_models:
+            start = time.monotonic()
+            try:
+                transport._send_live(PROBE_PROMPT, api_key, ai_model.name, timeout=timeout)
+                success, error = True, False
+            except Exception as e:
+                success, error = False, str(e)[:500]
+            probes.append({
+                'model_id': ai_model.id,
+                'success': success,
+                'latency': time.monotonic() - start,
+                'error_message': error,
+            })
+        self.create(probes)
+        self._update_health_states(ai_models)
+
+        self.env.cr.execute(SQL(
+            "DELETE FROM task_ai_provider_health WHERE probe_date < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)",
+            retention,
+        ))
+        _logger.info(f"Santé IA : {sum(probe['success'] for probe in probes)}/{len(probes)} modèles disponibles")
+        return True
+
+    @api.model
+    def _update_health_states(self, ai_models):
+        """
+        État de chaque modèle d'après ses dernières sondes :
+        - en panne : les task_manager.ai_health_down_after dernières ont échoué ;
+        - dégradé : un échec parmi les task_manager.ai_health_window dernières,
+          ou latence médiane au-delà de task_manager.ai_health_max_latency ;
+        - disponible sinon (inconnu sans aucune sonde).
+        """
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        window = int(IrConfigParam.get_param('task_manager.ai_health_window', '5'))
+        down_after = int(IrConfigParam.get_param('task_manager.ai_health_down_after', '3'))
+        max_latency = float(IrConfigParam.get_param('task_manager.ai_health_max_latency', '10'))
+
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """
+            SELECT model_id, success, latency
+              FROM (SELECT model_id, success, latency,
+                           row_number() OVER (PARTITION BY model_id ORDER BY probe_date DESC, id DESC) AS rank
+                      FROM task_ai_provider_health
+                     WHERE model_id = ANY(%s)) recent
+             WHERE rank <= %s
+             ORDER BY model_id, rank
+            """,
+            ai_models.ids, window,
+        ))
+        recent = {}
+        for model_id, success, latency in self.env.cr.fetchall():
+            recent.setdefault(model_id, []).append((success, latency))
+
+        by_state = {}
+        for ai_model in ai_models:
+            probes = recent.get(ai_model.id)
+            latencies = sorted(latency for success, latency in probes or [] if success)
+            if not probes:
+                state = 'unknown'
+            elif len(probes) >= min(down_after, window) and not any(success for success, latency in probes[:down_after]):
+                state = 'down'
+            elif not all(success for success, latency in probes) or latencies[len(latencies) // 2] > max_latency:
+                state = 'degraded'
+            else:
+                state = 'healthy'
+            if ai_model.health_state != state:
+                by_state.setdefault(state, []).append(ai_model.id)
+                _logger.warning(f"Santé IA : {ai_model.name} {ai_model.health_state} → {state}")
+        for state, model_ids in by_state.items():
+            ai_models.browse(model_ids).write({'health_state': state})
+
+    # ========== STATISTIQUES ==========
+
+    @api.model
+    def _get_health_stats(self, model_ids):
+        """{model_id: (p50, p95, disponibilité %, dernière sonde)} sur task_manager.ai_health_stats_window heures"""
+        hours = int(self.env['ir.config_parameter'].sudo().get_param('task_manager.ai_health_stats_window', '24'))
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """
+            SELECT model_id,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY latency) FILTER (WHERE success),
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY latency) FILTER (WHERE success),
+                   100.0 * COUNT(*) FILTER (WHERE success) / COUNT(*),
+                   MAX(probe_date)
+              FROM task_ai_provider_health
+             WHERE model_id = ANY(%s)
+               AND probe_date > (now() AT TIME ZONE 'UTC') - make_interval(hours => %s)
+             GROUP BY model_id
+            """,
+            model_ids, hours,
+        ))
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import logging
+import random
+import time
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+from .ai_health import HEALTH_STATES
+from .ai_transport import GEMINI_MODEL
+
+_logger = logging.getLogger(__name__)
+
+# Niveaux de qualité, du plus modeste au plus exigeant
+QUALITY_TIERS = [
+    ('basic', 'Basique'),
+    ('standard', 'Standard'),
+    ('advanced', 'Avancé'),
+]
+_TIER_RANK = {tier: rank for rank, (tier, label) in enumerate(QUALITY_TIERS)}
+
+# Niveau requis par défaut : une seule valeur en sortie pour la durée et la priorité
+DEFAULT_TIERS = {
+    'description': 'standard',
+    'subtasks': 'standard',
+    'duration': 'basic',
+    'priority': 'basic',
+    'triage': 'standard',
+}
+
+# Statistiques glissantes par base : {base: (horodatage, {(modèle, type): stats})}
+_stats_cache = {}
+
+
+class TaskAIModel(models.Model):
+    """
+    Modèles IA disponibles et routage des types de génération.
+
+    Chaque type de génération exige un niveau de qualité
+    (task_manager.ai_tier.<type>) ; parmi les modèles actifs de ce niveau ou
+    au-dessus, le routeur choisit le plus rapide d'après la latence médiane
+    et le taux d'erreur récents lus dans task.ai.history. Les modèles en
+    panne d'après les sondes de santé sont écartés, les modèles dégradés ne
+    servent qu'à défaut d'un modèle sain.
+    """
+    _name = 'task.ai.model'
+    _description = 'Modèle IA'
+    _order = 'sequence, id'
+
+    name = fields.Char(
+        string='Modèle',
+        required=True,
+        help="Identifiant du modèle chez le fournisseur (ex : gemini-flash-latest)"
+    )
+
+    quality_tier = fields.Selection(
+        QUALITY_TIERS,
+        string='Niveau de qualité',
+        required=True,
+        default='standard'
+    )
+
+    sequence = fields.Integer(default=10, help="Ordre de préférence sans statistiques")
+
+    active = fields.Boolean(default=True)
+
+    # ========== STATISTIQUES (historique récent) ==========
+
+    recent_calls = fields.Integer(string='Appels récents', compute='_compute_recent_stats')
+
+    recent_latency = fields.Float(string='Latence médiane (s)', compute='_compute_recent_stats')
+
+    recent_error_rate = fields.Float(string='Taux d\'erreur (%)', compute='_compute_recent_stats')
+
+    # ========== SANTÉ (sondes périodiques) ==========
+
+    health_state = fields.Selection(
+        HEALTH_STATES,
+        string='Santé',
+        default='unknown',
+        readonly=True,
+        help="Déduit des dernières sondes du cron de santé"
+    )
+
+    health_p50 = fields.Float(string='Latence p50 (s)', compute='_compute_health_stats', digits=(16, 3))
+
+    health_p95 = fields.Float(string='Latence p95 (s)', compute='_compute_health_stats', digits=(16, 3))
+
+    health_uptime = fields.Float(string='Disponibilité (%)', compute='_compute_health_stats')
+
+    health_last_probe = fields.Datetime(string='Dernière sonde', compute='_compute_health_stats')
+
+    _name_uniq = models.UniqueIndex("(name)")
+
+    def _compute_recent_stats(self):
+        stats = self._get_stats()
+        for model in self:
+            rows = [values for (name, gtype), values in stats.items() if name == model.name]
+            calls = sum(values['calls'] for values in rows)
+            successes = sum(values['calls'] - values['errors'] for values in rows if values['latency'] is not None)
+            model.recent_calls = calls
+            model.recent_error_rate = 100.0 * sum(values['errors'] for values in rows) / calls if calls else 0.0
+            # Médianes par type pondérées par le nombre d'appels réussis
+            model.recent_latency = sum(
+                values['latency'] * (values['calls'] - values['errors'])
+                for values in rows if values['latency'] is not None
+            ) / successes if successes else 0.0
+
+    def _compute_health_stats(self):
+        stats = self.env['task.ai.provider.health'].sudo()._get_health_stats(self.ids)
+        for model in self:
+            p50, p95, uptime, last_probe = stats.get(model.id, (None, None, None, None))
+            model.health_p50 = p50 or 0.0
+            model.health_p95 = p95 or 0.0
+            model.health_uptime = uptime or 0.0
+            model.health_last_probe = last_probe
+
+    def action_check_health(self):
+        """Lance les sondes de santé en arrière-plan, sans attendre le fournisseur"""
+        self.env.ref('ai_task_manager.ir_cron_ai_provider_health').sudo()._trigger()
+        states = dict(HEALTH_STATES)
+        summary = ', '.join(f"{model.name} : {states[model.health_state]}" for model in self.sudo().search([]))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': '🔄 Vérification lancée',
+                'message': f"Résultats dans Configuration → Santé des fournisseurs IA. État actuel : {summary}",
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+
+    # ========== STATISTIQUES GLISSANTES ==========
+
+    @api.model
+    def _get_stats(self):
+        """
+        {(modèle, type): {'calls', 'errors', 'latency'}} sur la fenêtre
+        task_manager.ai_routing_window (heures), recalculé au plus toutes
+        les task_manager.ai_routing_cache secondes par processus.
+        """
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        ttl = int(IrConfigParam.get_param('task_manager.ai_routing_cache', '60'))
+        cached = _stats_cache.get(self.env.cr.dbname)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        window = int(IrConfigParam.get_param('task_manager.ai_routing_window', '24'))
+        self.env['task.ai.history'].flush_model(['model_used', 'generation_type', 'success', 'provider_error',
+                                                 'execution_time', 'generation_date'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT model_used, generation_type, COUNT(*),
+                   COUNT(*) FILTER (WHERE provider_error),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY execution_time) FILTER (WHERE success)
+              FROM task_ai_history
+             WHERE generation_date > (now() AT TIME ZONE 'UTC') - make_interval(hours => %s)
+               AND model_used IS NOT NULL
+               -- Refus locaux (budget, santé, quota) : le fournisseur n'a pas été appelé
+               AND (success OR provider_error)
+             GROUP BY model_used, generation_type
+            """,
+            window,
+        ))
+        stats = {
+            (name, gtype): {'calls': calls, 'errors': errors, 'latency': latency}
+            for name, gtype, calls, errors, latency in self.env.cr.fetchall()
+        }
+        _stats_cache[self.env.cr.dbname] = (time.monotonic(), stats)
+        return stats
+
+    # ========== ROUTAGE ==========
+
+    @api.model
+    def _route(self, generation_type):
+        """Nom du modèle à utiliser pour ce type de génération"""
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        tier = IrConfigParam.get_param(f'task_manager.ai_tier.{generation_type}',
+                                       DEFAULT_TIERS.get(generation_type, 'standard'))
+        candidates = self.sudo().search([]).filtered(
+            lambda model: _TIER_RANK[model.quality_tier] >= _TIER_RANK.get(tier, 1)
+        )
+        if not candidates:
+            return GEMINI_MODEL
+
+        # Santé : échec immédiat si tout est en panne, modèles sains en priorité
+        available = candidates.filtered(lambda model: model.health_state != 'down')
+        if not available:
+            raise UserError(
+                "❌ Fournisseur IA indisponible : tous les modèles de ce niveau sont en panne "
+                "d'après les dernières sondes. Réessayez dans quelques minutes."
+            )
+        candidates = available.filtered(lambda model: model.health_state != 'degraded') or available
+
+        max_error_rate = float(IrConfigParam.get_param('task_manager.ai_max_error_rate', '0.2'))
+        min_calls = int(IrConfigParam.get_param('task_manager.ai_routing_min_calls', '5'))
+        exploration = float(IrConfigParam.get_param('task_manager.ai_routing_exploration', '0.05'))
+        stats = self._get_stats()
+
+        measured, unknown = [], []
+        for model in candidates:
+            values = stats.get((model.name, generation_type))
+            if not values or values['calls'] < min_calls:
+                unknown.append(model)
+            elif values['latency'] is not None and values['errors'] / values['calls'] <= max_error_rate:
+                measured.append((values['latency'], model.sequence, model))
+
+        # Une petite part du trafic va aux modèles sans mesures suffisantes
+        if unknown and (not measured or random.random() < exploration):
+            return unknown[0].name
+        if measured:
+            return min(measured, key=lambda item: item[:2])[2].name
+        # Tous les modèles échouent trop : le plus fiable malgré tout
+        return min(candidates, key=lambda model: (
+            stats[(model.name, generation_type)]['errors'] / stats[(model.name, generation_type)]['calls'],
+            model.sequence,
+        )).name
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from odoo import models, api
+from odoo.exceptions import UserError
+from odoo.tools import config as odoo_config, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Modèle Gemini utilisé pour les appels réels
+GEMINI_MODEL = 'gemini-flash-latest'
+
+# Modes de transport : appels réels, appels réels enregistrés, rejeu hors ligne
+TRANSPORT_MODES = ('live', 'record', 'replay')
+
+# Cassettes chargées en mémoire : {chemin: (mtime, {clé: entrée}, {type: [entrées]})}
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+# Occurrences de chaque prompt rejoué : le tirage d'erreur ne dépend que de
+# (graine, prompt, n-ième occurrence), pas de l'ordre des appels entre prompts
+_replay_occurrences = Counter()
+
+
+class AIProviderError(UserError):
+    """Échec du fournisseur lui-même (réseau, quota, réponse invalide), à la différence d'une erreur de configuration"""
+
+
+class TaskAITransport(models.AbstractModel):
+    """
+    Transport des appels IA sous _call_ai.
+
+    - live : appel Gemini ;
+    - record : appel Gemini, puis ajout du couple prompt/réponse (et de la
+      latence mesurée) à la cassette ;
+    - replay : réponse lue dans la cassette, sans réseau ni clé API, avec
+      latence et taux d'erreur configurables. Un prompt absent est servi par
+      une réponse enregistrée du même type de génération, choisie de façon
+      déterministe.
+
+    Le mode et la cassette se règlent par paramètres système ou, en priorité,
+    par variables d'environnement (pratique en CI) :
+    TASK_MANAGER_AI_TRANSPORT, TASK_MANAGER_AI_CASSETTE.
+    """
+    _name = 'task.ai.transport'
+    _description = 'Transport des appels IA'
+
+    # ========== CONFIGURATION ==========
+
+    @api.model
+    def _get_param(self, key, default=None):
+        env_key = key.upper().replace('.', '_')
+        value = os.environ.get(env_key)
+        if value is None:
+            value = self.env['ir.config_parameter'].sudo().get_param(key, default)
+        return value
+
+    @api.model
+    def _get_mode(self):
+        mode = self._get_param('task_manager.ai_transport', 'live')
+        if mode not in TRANSPORT_MODES:
+            raise UserError(f"❌ Mode de transport IA inconnu : {mode} ({', '.join(TRANSPORT_MODES)})")
+        return mode
+
+    @api.model
+    def _get_cassette_path(self):
+        path = self._get_param('task_manager.ai_cassette')
+        if not path:
+            path = os.path.join(odoo_config['data_dir'], 'task_manager', f'cassette_{self.env.cr.dbname}.jsonl')
+        return path
+
+    @staticmethod
+    def _key(prompt):
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+    # ========== ENVOI ==========
+
+    @api.model
+    def send(self, prompt, api_key=None, generation_type=None, model_name=GEMINI_MODEL):
+        """Envoie le prompt selon le mode courant. Retourne (texte, tokens)."""
+        mode = self._get_mode()
+        if mode == 'replay':
+            return self._replay(prompt, generation_type)
+
+        start = time.time()
+        text, tokens = self._send_live(prompt, api_key, model_name)
+        if mode == 'record':
+            self._record({
+                'key': self._key(prompt),
+                'generation_type': generation_type,
+                'model': model_name,
+                'prompt': prompt,
+                'response': text,
+                'tokens': tokens,
+                'latency_ms': round((time.time() - start) * 1000),
+            })
+        return text, tokens
+
+    @api.model
+    def _send_live(self, prompt, api_key, model_name, timeout=None):
+        if not api_key:
+            raise UserError(
+                "❌ Clé API Gemini non configurée!\n\n"
+                "1. Obtenez une clé GRATUITE:\n"
+                "   https://makersuite.google.com/app/apikey\n\n"
+                "2. Dans Odoo:\n"
+                "   Paramètres → Technique → Paramètres système\n"
+                "   Créez: task_manager.gemini_api_key\n\n"
+                "3. Redémarrez et testez!"
+            )
+        genai = self._import_sdk()
+        genai.configure(api_key=api_key)
+        try:
+            model = genai.GenerativeModel(model_name)
+            response = model.generate_content(prompt, request_options={'timeout': timeout} if timeout else None)
+            usage = getattr(response, 'usage_metadata', None)
+            return response.text, getattr(usage, 'total_token_count', 0) or 0
+        except Exception as e:
+            raise AIProviderError(f"❌ Erreur Gemini: {e}") from e
+
+    @api.model
+    def _import_sdk(self):
+        """
+        SDK Gemini importé au premier appel réel : les processus qui n'appellent
+        jamais l'IA (crons, longpolling, rejeu) ne paient ni son temps
+        d'import ni sa mémoire.
+        """
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            raise UserError("❌ Le SDK Gemini n'est pas installé : pip install google-generativeai")
+        return genai
+
+    # ========== CASSETTES ==========
+
+    @api.model
+    def _record(self, entry):
+        path = self._get_cassette_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _cassettes_lock, open(path, 'a', encoding='utf-8') as cassette:
+            cassette.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    @api.model
+    def _load_cassette(self):
+        """Charge la cassette (mise en cache tant que le fichier ne change pas)"""
+        path = self._get_cassette_path()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise UserError(f"❌ Cassette IA introuvable : {path}")
+        with _cassettes_lock:
+            cached = _cassettes.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1], cached[2]
+            by_key, by_type = {}, {}
+            with open(path, encoding='utf-8') as cassette:
+                for line in cassette:
+                    if line.strip():
+                        entry = json.loads(line)
+                        by_key[entry['key']] = entry
+                        by_type.setdefault(entry.get('generation_type'), []).append(entry)
+            _cassettes[path] = (mtime, by_key, by_type)
+            return by_key, by_type
+
+    @api.model
+    def _replay(self, prompt, generation_type):
+        by_key, by_type = self._load_cassette()
+        key = self._key(prompt)
+        entry = by_key.get(key)
+        if not entry:
+            candidates = by_type.get(generation_type)
+            if not candidates:
+                raise UserError(f"❌ Aucune réponse enregistrée pour ce prompt ({generation_type or 'type inconnu'})")
+            entry = candidates[int(key, 16) % len(candidates)]
+
+        seed = self._get_param('task_manager.ai_replay_seed', '0')
+        with _cassettes_lock:
+            occurrence = _replay_occurrences[(seed, key)]
+            _replay_occurrences[(seed, key)] += 1
+        rng = random.Random(f"{seed}:{key}:{occurrence}")
+
+        latency = self._get_param('task_manager.ai_replay_latency', 'recorded')
+        latency_ms = entry.get('latency_ms', 0) if latency == 'recorded' else float(latency)
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+        error_rate = float(self._get_param('task_manager.ai_replay_error_rate', '0'))
+        if error_rate and rng.random() < error_rate:
+            raise AIProviderError("❌ Erreur simulée (rejeu IA)")
+        return entry['response'], entry.get('tokens', 0)
+
+    @api.model
+    def seed_cassette_from_history(self, limit=None):
+        """Ajoute à la cassette les générations réussies de l'historique IA"""
+        History = self.env['task.ai.history']
+        path = self._get_cassette_path()
+        known = set(self._load_cassette()[0]) if os.path.exists(path) else set()
+        count = 0
+        ids = History.search([('success', '=', True)], limit=limit, order='id').ids
+        for batch_ids in split_every(1000, ids):
+            batch = History.browse(batch_ids)
+            for log in batch:
+                if not log.prompt_sent:
+                    continue
+                key = self._key(log.prompt_sent)
+                if key in known:
+                    continue
+                known.add(key)
+                self._record({
+                    'key': key,
+                    'generation_type': log.generation_type,
+                    'model': log.model_used,
+                    'prompt': log.prompt_sent,
+                    'response': log.response_received or '',
+                    'tokens': log.tokens_used,
+                    'latency_ms': round((log.execution_time or 0.0) * 1000),
+                })
+                count += 1
+            batch.invalidate_recordset()
+        _logger.info(f"Cassette IA : {count} entrées ajoutées depuis l'historique")
+        return count
@@ -1,16 +1,16 @@
 # -*- coding: utf-8 -*-
-# Import Google Gemini directement
-import google.generativeai as genai
+import hashlib
 import logging
 import time
 import re
 import os
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError, UserError
-from datetime import date
+from odoo.tools import SQL, html2plaintext
+from datetime import date, timedelta
+from .ai_transport import AIProviderError
 
 _logger = logging.getLogger(__name__)
-_logger.info("✅ Module task.py chargé - Gemini importé")
 
 
 class TaskManagerTask(models.Model):
@@ -18,6 +18,8 @@ class TaskManagerTask(models.Model):
     _description = 'Task Manager - Task'
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'priority desc, deadline asc, id desc'
+    _parent_store = True
+    _parent_name = 'parent_id'
 
     # ========== CHAMPS DE BASE ==========
     
@@ -29,9 +31,13 @@ class TaskManagerTask(models.Model):
         help="Titre court et descriptif de la tâche"
     )
     
+    # Les textes volumineux forment leur propre groupe de préchargement
+    # ('ai_content') : lire name/state sur un lot de tâches ne les charge pas,
+    # ils ne sont lus qu'ensemble et à la demande (vue formulaire).
     description = fields.Text(
         string='Description',
         tracking=True,
+        prefetch='ai_content',
         help="Description détaillée de la tâche"
     )
     
@@ -81,16 +87,170 @@ class TaskManagerTask(models.Model):
         help="Membre d'équipe assigné"
     )
     
+    required_role = fields.Selection(
+        selection=lambda self: self.env['task.manager.team.member']._fields['role'].selection,
+        string='Rôle requis',
+        help="Rôle attendu pour l'assignation automatique (vide = tout rôle)"
+    )
+    
+    # ========== HIÉRARCHIE (SOUS-TÂCHES) ==========
+    
+    parent_id = fields.Many2one(
+        'task.manager.task',
+        string='Tâche parente',
+        index=True,
+        ondelete='cascade',
+        help="Tâche principale dont celle-ci est une sous-tâche"
+    )
+    
+    child_ids = fields.One2many(
+        'task.manager.task',
+        'parent_id',
+        string='Sous-tâches'
+    )
+    
+    # Chemin matérialisé "1/4/9/" : un préfixe LIKE donne tout le sous-arbre
+    parent_path = fields.Char(index=True)
+    
+    ai_generated = fields.Boolean(
+        string='Générée par IA',
+        readonly=True,
+        help="Sous-tâche créée à partir de la réponse de l'IA"
+    )
+    
+    subtree_task_count = fields.Integer(
+        string='Tâches (sous-arbre)',
+        compute='_compute_subtree_rollups'
+    )
+    
+    subtree_estimated_hours = fields.Float(
+        string='Heures estimées (sous-arbre)',
+        compute='_compute_subtree_rollups'
+    )
+    
+    subtree_progress = fields.Float(
+        string='Avancement (%)',
+        compute='_compute_subtree_rollups'
+    )
+    
+    # ========== ENRICHISSEMENT IA AUTOMATIQUE ==========
+    
+    ai_enrich_due = fields.Datetime(
+        string='Enrichissement IA prévu',
+        readonly=True,
+        index='btree_not_null',
+        copy=False,
+        help="Repoussé à chaque modification du titre ou de la description"
+    )
+    
+    ai_enrich_hash = fields.Char(
+        string='Empreinte enrichie',
+        readonly=True,
+        copy=False,
+        help="Empreinte du titre et de la description lors du dernier enrichissement"
+    )
+    
+    # ========== EMAILS ENTRANTS ==========
+    
+    ai_triage_state = fields.Selection([
+        ('pending', 'En attente'),
+        ('done', 'Trié'),
+        ('failed', 'Échec'),
+    ], string='Tri IA', readonly=True, copy=False,
+        help="Tri IA par lots des tâches créées depuis un email")
+    
+    # ========== EMPREINTES DES SORTIES IA ==========
+    
+    ai_fp_description = fields.Char(
+        string='Empreinte (description IA)',
+        readonly=True,
+        copy=False,
+        help="Empreinte des entrées (titre) lors de la dernière génération"
+    )
+    
+    ai_fp_subtasks = fields.Char(
+        string='Empreinte (sous-tâches IA)',
+        readonly=True,
+        copy=False,
+        help="Empreinte des entrées (titre, description) lors de la dernière génération"
+    )
+    
+    ai_fp_duration = fields.Char(
+        string='Empreinte (durée IA)',
+        readonly=True,
+        copy=False,
+        help="Empreinte des entrées (titre, description) lors de la dernière estimation"
+    )
+    
+    ai_fp_priority = fields.Char(
+        string='Empreinte (priorité IA)',
+        readonly=True,
+        copy=False,
+        help="Empreinte des entrées (titre, description, échéance) lors de la dernière suggestion"
+    )
+    
+    ai_output_stale = fields.Boolean(
+        string='Résultats IA périmés',
+        compute='_compute_ai_output_stale',
+        store=True,
+        help="Une sortie IA a été générée à partir d'entrées qui ont changé depuis"
+    )
+    
+    # ========== DÉPENDANCES ET PLANNING ==========
+    
+    depends_on_ids = fields.Many2many(
+        'task.manager.task',
+        'task_manager_task_dependency_rel',
+        'task_id',
+        'depends_on_id',
+        string='Dépend de',
+        help="Tâches qui doivent être terminées avant de commencer celle-ci"
+    )
+    
+    blocking_ids = fields.Many2many(
+        'task.manager.task',
+        'task_manager_task_dependency_rel',
+        'depends_on_id',
+        'task_id',
+        string='Bloque',
+        help="Tâches qui attendent la fin de celle-ci"
+    )
+    
+    forecast_start = fields.Date(
+        string='Début prévu',
+        readonly=True,
+        help="Début au plus tôt calculé à partir des dépendances"
+    )
+    
+    forecast_finish = fields.Date(
+        string='Fin prévue',
+        readonly=True,
+        help="Fin au plus tôt calculée à partir des dépendances et de la capacité du membre"
+    )
+    
+    forecast_slack = fields.Integer(
+        string='Marge (jours)',
+        readonly=True,
+        help="Retard possible sans décaler l'échéance ni la fin du planning"
+    )
+    
+    is_critical = fields.Boolean(
+        string='Chemin critique',
+        readonly=True
+    )
+    
     # ========== CHAMPS IA ==========
     
     ai_suggestions = fields.Html(
         string='Suggestions IA',
         readonly=True,
+        prefetch='ai_content',
         help="Suggestions générées par l'intelligence artificielle"
     )
     
     subtasks = fields.Text(
         string='Sous-tâches suggérées',
+        prefetch='ai_content',
         help="Liste des sous-tâches générées par IA"
     )
     
@@ -103,10 +263,11 @@ class TaskManagerTask(models.Model):
     )
     
     # Compteur de générations
+    # Compteur tenu à jour par task.ai.history (create / write / unlink)
     ai_suggestion_count = fields.Integer(
         string='Nombre de suggestions IA',
-        compute='_compute_ai_suggestion_count',
-        store=True
+        default=0,
+        readonly=True
     )
     
     # ========== CHAMPS CALCULÉS ==========
@@ -122,6 +283,18 @@ class TaskManagerTask(models.Model):
     
     active = fields.Boolean(default=True)
     
+    # Recherche de sous-arbre par préfixe : LIKE 'x/%' doit pouvoir utiliser l'index
+    _parent_path_prefix_idx = models.Index("(parent_path text_pattern_ops)")
+    
+    # Lectures incrémentales (exports, synchronisation) ordonnées par (write_date, id)
+    _write_date_id_idx = models.Index("(write_date, id)")
+    
+    # File du tri IA : seules les tâches en attente sont indexées
+    _triage_pending_idx = models.Index("(id) WHERE ai_triage_state = 'pending'")
+    
+    # Rappels d'échéance : seules les tâches ouvertes sont parcourues
+    _open_deadline_idx = models.Index("(deadline) WHERE state != 'done' AND active")
+    
     # ========== MÉTHODES DE CALCUL ==========
     
     @api.depends('deadline', 'state')
@@ -134,11 +307,37 @@ class TaskManagerTask(models.Model):
             else:
                 task.is_overdue = False
     
-    @api.depends('ai_history_ids')
-    def _compute_ai_suggestion_count(self):
-        """Compte le nombre de générations IA réussies"""
+    @api.depends('name', 'description', 'deadline',
+                 'ai_fp_description', 'ai_fp_subtasks', 'ai_fp_duration', 'ai_fp_priority')
+    def _compute_ai_output_stale(self):
+        """Périmé si une sortie IA ne correspond plus à ses entrées actuelles"""
         for task in self:
-            task.ai_suggestion_count = len(task.ai_history_ids.filtered(lambda h: h.success))
+            task.ai_output_stale = bool(task._ai_stale_types())
+    
+    @api.depends('child_ids.estimated_hours', 'child_ids.state', 'estimated_hours', 'state')
+    def _compute_subtree_rollups(self):
+        """Agrège le sous-arbre (tâche incluse) en une requête via le chemin matérialisé"""
+        task_ids = [tid for tid in self.ids if tid]
+        rollups = {}
+        if task_ids:
+            self.flush_model(['parent_path', 'estimated_hours', 'state', 'active'])
+            self.env.cr.execute(SQL(
+                """
+                SELECT root.id, COUNT(t.id), COALESCE(SUM(t.estimated_hours), 0),
+                       COUNT(t.id) FILTER (WHERE t.state = 'done')
+                  FROM task_manager_task root
+                  JOIN task_manager_task t ON t.parent_path LIKE root.parent_path || '%%'
+                 WHERE root.id = ANY(%s) AND t.active
+                 GROUP BY root.id
+                """,
+                task_ids,
+            ))
+            rollups = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for task in self:
+            count, hours, done = rollups.get(task.id, (1, task.estimated_hours, int(task.state == 'done')))
+            task.subtree_task_count = count
+            task.subtree_estimated_hours = hours
+            task.subtree_progress = done / count * 100 if count else 0.0
     
     # ========== CONTRAINTES ==========
     
@@ -150,58 +349,450 @@ class TaskManagerTask(models.Model):
                 if task.state == 'new':  # Seulement pour les nouvelles tâches
                     raise ValidationError("La date limite ne peut pas être dans le passé.")
     
+    @api.constrains('parent_id')
+    def _check_parent_recursion(self):
+        if self._has_cycle():
+            raise ValidationError("Une tâche ne peut pas être sa propre sous-tâche.")
+    
+    @api.constrains('depends_on_ids', 'blocking_ids')
+    def _check_dependency_cycle(self):
+        """Interdit les dépendances circulaires, qu'elles passent par 'Dépend de' ou 'Bloque'"""
+        if (self | self.blocking_ids)._has_cycle('depends_on_ids'):
+            raise ValidationError("Dépendance circulaire : une tâche ne peut pas dépendre d'elle-même, même indirectement.")
+    
+    # ========== CRÉATION / MODIFICATION ==========
+    
+    # Champs dont dépend la prévision du planning
+    _SCHEDULE_FIELDS = {'estimated_hours', 'depends_on_ids', 'blocking_ids', 'team_member_id',
+                        'state', 'deadline', 'active'}
+    
+    # Dimensions des agrégats du tableau de bord
+    _REPORT_FIELDS = {'state', 'priority', 'team_member_id', 'deadline', 'estimated_hours', 'active'}
+    
+    # Champs dont la modification (re)programme l'enrichissement automatique
+    _AI_ENRICH_FIELDS = {'name', 'description'}
+    
+    @api.model
+    def _get_ai_enrich_due(self):
+        """Échéance de l'enrichissement automatique, ou False s'il est désactivé"""
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if self.env.context.get('task_manager_ai_write') or \
+                IrConfigParam.get_param('task_manager.ai_auto_enrich', 'False') != 'True':
+            return False
+        delay = int(IrConfigParam.get_param('task_manager.ai_auto_enrich_delay', '300'))
+        return fields.Datetime.now() + timedelta(seconds=delay)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        enrich_due = self._get_ai_enrich_due()
+        if enrich_due:
+            vals_list = [dict(vals, ai_enrich_due=enrich_due) for vals in vals_list]
+        tasks = super().create(vals_list)
+        Report = self.env['task.manager.task.report']
+        Report._apply_deltas(Report._collect(tasks, 1))
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if IrConfigParam.get_param('task_manager.auto_assign_on_create', 'False') == 'True':
+            self.env['task.manager.assignment'].assign_tasks(tasks)
+        self.env['task.manager.scheduler'].recompute_from(tasks.ids)
+        self.env['task.manager.semantic.index']._schedule_update(tasks.ids)
+        return tasks
+    
+    def write(self, vals):
+        if self._AI_ENRICH_FIELDS.intersection(vals):
+            # Chaque modification repousse l'échéance : les saisies successives
+            # se regroupent en un seul enrichissement
+            enrich_due = self._get_ai_enrich_due()
+            if enrich_due:
+                vals = dict(vals, ai_enrich_due=enrich_due)
+        Report = self.env['task.manager.task.report']
+        report_deltas = None
+        if self._REPORT_FIELDS.intersection(vals):
+            report_deltas = Report._collect(self, -1)
+        res = super().write(vals)
+        if report_deltas is not None:
+            Report._apply_deltas(Report._collect(self, 1, report_deltas))
+        if self._SCHEDULE_FIELDS.intersection(vals):
+            self.env['task.manager.scheduler'].recompute_from(self.ids)
+        SemanticIndex = self.env['task.manager.semantic.index']
+        if SemanticIndex._INDEXED_FIELDS.union({'active'}).intersection(vals):
+            SemanticIndex._schedule_update(self.ids)
+        return res
+    
+    def unlink(self):
+        # Les sous-tâches partiraient par la cascade SQL de parent_id, sans
+        # passer ici : on les supprime avec leurs parents par l'ORM
+        tasks = self.with_context(active_test=False).search([('id', 'child_of', self.ids)])
+        successor_ids = (tasks.blocking_ids - tasks).ids
+        Report = self.env['task.manager.task.report']
+        report_deltas = Report._collect(tasks, -1)
+        task_ids = tasks.ids
+        res = super(TaskManagerTask, tasks).unlink()
+        Report._apply_deltas(report_deltas)
+        self.env['task.manager.scheduler'].recompute_from(successor_ids)
+        self.env['task.manager.semantic.index']._schedule_update(task_ids)
+        return res
+    
+    # ========== PASSERELLE EMAIL ==========
+    
+    @api.model
+    def message_new(self, msg_dict, custom_values=None):
+        """
+        Crée la tâche dès réception de l'email ; priorité, durée et rôle sont
+        fixés ensuite par le tri IA par lots (task.manager.triage), qui
+        remplace l'enrichissement automatique pour ces tâches.
+        """
+        values = {
+            'name': msg_dict.get('subject') or "(sans objet)",
+            'description': html2plaintext(msg_dict.get('body') or ''),
+            'ai_triage_state': 'pending',
+            'user_id': False,
+        }
+        values.update(custom_values or {})
+        return super(TaskManagerTask, self.with_context(task_manager_ai_write=True)).message_new(msg_dict, values)
+    
+    def message_update(self, msg_dict, update_vals=None):
+        """Une réponse sur une tâche ouverte la remet dans la file du tri IA"""
+        update_vals = dict(update_vals or {})
+        if 'ai_triage_state' not in update_vals and all(task.state != 'done' for task in self):
+            update_vals['ai_triage_state'] = 'pending'
+        return super().message_update(msg_dict, update_vals=update_vals)
+    
+    def action_recompute_schedule(self):
+        """Recalcule le planning complet des tâches ouvertes"""
+        self.env['task.manager.scheduler'].recompute_schedule()
+        return True
+    
+    # ========== LECTURE ==========
+    
+    # Champs volumineux exclus des lectures sans liste de champs explicite
+    _AI_CONTENT_FIELDS = {'description', 'subtasks', 'ai_suggestions'}
+    
+    def read(self, fields=None, load='_classic_read'):
+        """Un read() RPC sans liste de champs ne renvoie pas les textes IA volumineux"""
+        if not fields:
+            fields = [name for name in self.fields_get(attributes=['type'])
+                      if name not in self._AI_CONTENT_FIELDS]
+        return super().read(fields, load=load)
+    
     # ========== MÉTHODES DE GESTION DES TÂCHES ==========
     
     def action_start_task(self):
         """Démarre la tâche"""
-        for task in self:
-            if task.state == 'new':
-                task.state = 'in_progress'
-        return True
+        return self._transition_state('in_progress', from_states={'new'})
     
     def action_complete_task(self):
         """Termine la tâche"""
-        for task in self:
-            if task.state == 'in_progress':
-                task.state = 'done'
-        return True
+        return self._transition_state('done', from_states={'in_progress'})
     
     def action_reset_task(self):
         """Réinitialise la tâche"""
-        for task in self:
-            task.state = 'new'
+        return self._transition_state('new')
+    
+    def _transition_state(self, new_state, from_states=None):
+        """
+        Change l'état d'une sélection de tâches de façon ensembliste : une
+        seule écriture groupée, le suivi (chatter) créé en un lot de messages,
+        puis un seul flush des calculs dépendants (retard, compteurs des
+        membres, statistiques, planning). Le nombre de requêtes ne dépend pas
+        de la taille de la sélection.
+        """
+        tasks = self.filtered(lambda task: task.state != new_state and
+                              (from_states is None or task.state in from_states))
+        if not tasks:
+            return True
+        old_states = {task.id: task.state for task in tasks}
+        tasks.with_context(tracking_disable=True).write({'state': new_state})
+        tasks._log_state_tracking(old_states, new_state)
+        self.env.flush_all()
         return True
     
+    def _log_state_tracking(self, old_states, new_state):
+        """Messages de suivi du changement d'état, créés en un seul lot"""
+        labels = dict(self._fields['state']._description_selection(self.env))
+        field_id = self.env['ir.model.fields']._get(self._name, 'state').id
+        subtype_id = self.env['ir.model.data']._xmlid_to_res_id('mail.mt_note')
+        author_id = self.env.user.partner_id.id
+        self.env['mail.message'].sudo().create([{
+            'model': self._name,
+            'res_id': task.id,
+            'message_type': 'notification',
+            'subtype_id': subtype_id,
+            'author_id': author_id,
+            'body': '',
+            'tracking_value_ids': [(0, 0, {
+                'field_id': field_id,
+                'old_value_char': labels.get(old_states[task.id]),
+                'new_value_char': labels.get(new_state),
+            })],
+        } for task in self])
+    
+    def action_auto_assign(self):
+        """Répartit les tâches sélectionnées sans membre selon la charge de l'équipe"""
+        assignments = self.env['task.manager.assignment'].assign_tasks(self)
+        count = sum(len(task_ids) for task_ids in assignments.values())
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': '✅ Assignation terminée',
+                'message': f'{count} tâche(s) assignée(s) à {len(assignments)} membre(s).',
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
     # ========== MÉTHODES IA ==========
     
-    def _call_ai(self, prompt, config):
+    # Champs relationnels : le client recharge l'enregistrement au lieu de les patcher
+    _AI_UPDATE_RELOAD_FIELDS = {'child_ids'}
+    
+    def _notify_ai_update(self, field_names):
+        """
+        Envoie les nouvelles valeurs au navigateur de l'utilisateur par le bus
+        (après commit) : le formulaire ouvert les applique sur place, sans
+        recharger tout le client web (chatter, abonnés, activités, historique).
+        """
+        self.ensure_one()
+        simple_fields = [name for name in field_names if name not in self._AI_UPDATE_RELOAD_FIELDS]
+        self.env.user._bus_send('task_manager.ai_update', {
+            'model': self._name,
+            'id': self.id,
+            'values': self.read(simple_fields)[0] if simple_fields else {},
+            'reload': bool(self._AI_UPDATE_RELOAD_FIELDS.intersection(field_names)),
+        })
+    
+    # ========== DÉDOUBLONNAGE DES APPELS IA ==========
+    
+    def _ai_single_flight(self, generation_type, prompt):
+        """
+        Fusionne les appels IA identiques simultanés (même tâche, même type,
+        même prompt) entre workers par un verrou consultatif transactionnel,
+        libéré au commit de l'appel en cours. Sans concurrence, l'appel part
+        toujours (une régénération volontaire n'est jamais court-circuitée).
+        Retourne True seulement si l'on a dû attendre un appel identique et
+        qu'il a réussi pendant notre attente : son résultat est déjà en base
+        et l'appel est inutile (désactivable par task_manager.ai_single_flight_reuse).
+        """
+        self.ensure_one()
+        prompt_hash = self.env['task.ai.history']._prompt_hash(prompt)
+        digest = hashlib.sha256(f"{self.id}:{generation_type}:{prompt_hash}".encode()).digest()
+        lock_key = int.from_bytes(digest[:8], 'big', signed=True)
+        self.env.cr.execute(SQL("SELECT pg_try_advisory_xact_lock(%s)", lock_key))
+        if self.env.cr.fetchone()[0]:
+            return False
+        # Un appel identique est en cours : on attend sa fin. Début de l'attente
+        # pris sur la même horloge (et à la seconde près) que generation_date,
+        # renseignée par l'appel en cours à la fin de sa requête
+        wait_start = fields.Datetime.now()
+        self.env.cr.execute(SQL("SELECT pg_advisory_xact_lock(%s)", lock_key))
+        
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if IrConfigParam.get_param('task_manager.ai_single_flight_reuse', 'True') != 'True':
+            return False
+        # Le résultat attendu a été validé après le début de notre transaction :
+        # il n'est visible que depuis un nouveau curseur
+        with self.env.registry.cursor() as cr:
+            cr.execute(SQL(
+                """
+                SELECT 1 FROM task_ai_history
+                 WHERE task_id = %s AND generation_type = %s AND prompt_hash = %s AND success
+                   AND generation_date >= %s
+                 LIMIT 1
+                """,
+                self.id, generation_type, prompt_hash, wait_start,
+            ))
+            return bool(cr.fetchone())
+    
+    def _ai_reused_result(self):
+        """Le formulaire recharge la tâche : nos valeurs lues dateraient d'avant l'appel réutilisé"""
+        self.ensure_one()
+        self.env.user._bus_send('task_manager.ai_update', {
+            'model': self._name,
+            'id': self.id,
+            'values': {},
+            'reload': True,
+        })
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': '✅ Déjà généré',
+                'message': 'Une requête identique vient d\'aboutir : son résultat a été repris.',
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
+    # Entrées dont dépend chaque sortie IA (celles de son prompt)
+    _AI_OUTPUT_INPUTS = {
+        'description': ('name',),
+        'subtasks': ('name', 'description'),
+        'duration': ('name', 'description'),
+        'priority': ('name', 'description', 'deadline'),
+    }
+    
+    def _ai_content_hash(self, field_names=('name', 'description')):
+        """Empreinte des champs donnés (par défaut le titre et la description)"""
+        self.ensure_one()
+        content = "\x00".join(str(self[name] or '') for name in field_names)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+    
+    def _ai_fingerprint(self, generation_type):
+        """Valeurs à écrire avec une sortie IA : l'empreinte des entrées de son prompt"""
+        return {f'ai_fp_{generation_type}': self._ai_content_hash(self._AI_OUTPUT_INPUTS[generation_type])}
+    
+    def _ai_stale_types(self):
+        """Types de génération dont la sortie a été produite à partir d'autres entrées"""
+        self.ensure_one()
+        return [
+            generation_type for generation_type, inputs in self._AI_OUTPUT_INPUTS.items()
+            if self[f'ai_fp_{generation_type}'] and
+            self[f'ai_fp_{generation_type}'] != self._ai_content_hash(inputs)
+        ]
+    
+    def action_refresh_stale_ai(self):
+        """
+        Régénère uniquement les sorties IA périmées des tâches sélectionnées :
+        aucune requête au fournisseur pour une tâche dont les entrées n'ont pas
+        changé. La description passe en premier, les autres sorties en dépendant.
+        """
+        actions = {
+            'description': 'action_generate_ai_description',
+            'subtasks': 'action_generate_ai_subtasks',
+            'duration': 'action_estimate_duration',
+            'priority': 'action_suggest_priority',
+        }
+        # Traitement synchrone borné : le reste attend une nouvelle exécution
+        limit = int(self.env['ir.config_parameter'].sudo().get_param('task_manager.ai_refresh_limit', '20'))
+        stale = self.filtered('ai_output_stale')
+        remaining = len(stale[limit:])
+        refreshed = failed = calls = 0
+        for task in stale[:limit]:
+            success = True
+            for generation_type, method in actions.items():
+                if generation_type not in task._ai_stale_types():
+                    continue
+                previous_fp = task[f'ai_fp_{generation_type}']
+                try:
+                    with self.env.cr.savepoint():
+                        result = getattr(task, method)()
+                except UserError as e:
+                    _logger.warning(f"Rafraîchissement IA de la tâche {task.id} échoué : {e}")
+                    success = False
+                    break
+                calls += 1
+                # Certaines actions signalent l'échec par une notification, sans lever
+                if isinstance(result, dict) and result.get('params', {}).get('type') == 'danger':
+                    _logger.warning(f"Rafraîchissement IA de la tâche {task.id} échoué : {result['params'].get('message')}")
+                    # L'empreinte a pu être posée avant l'erreur : la sortie reste périmée
+                    task.with_context(task_manager_ai_write=True).write({f'ai_fp_{generation_type}': previous_fp})
+                    success = False
+                    break
+            if success:
+                refreshed += 1
+            else:
+                failed += 1
+        
+        message = (f'{refreshed} tâche(s) rafraîchie(s), {calls} génération(s), '
+                   f'{failed} échec(s). Les tâches à jour ont été ignorées.')
+        if remaining:
+            message += f' {remaining} tâche(s) restante(s) : relancez l\'action.'
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': '✅ Résultats IA rafraîchis',
+                'message': message,
+                'type': 'warning' if failed or remaining else 'success',
+                'sticky': bool(remaining),
+            }
+        }
+    
+    @api.model
+    def _cron_auto_enrich(self):
+        """
+        Enrichit les tâches dont le titre et la description n'ont plus bougé
+        depuis le délai configuré. Au plus task_manager.ai_auto_enrich_batch
+        tâches par passage pour ne pas saturer le fournisseur ; le reste
+        attend le passage suivant.
         """
-        Appelle l'API Google Gemini (100% gratuit)
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if IrConfigParam.get_param('task_manager.ai_auto_enrich', 'False') != 'True':
+            return True
+        batch = int(IrConfigParam.get_param('task_manager.ai_auto_enrich_batch', '20'))
+        delay = int(IrConfigParam.get_param('task_manager.ai_auto_enrich_delay', '300'))
+        tasks = self.search(
+            [('ai_enrich_due', '<=', fields.Datetime.now())],
+            order='ai_enrich_due asc',
+            limit=batch,
+        )
+        for task in tasks.with_context(task_manager_ai_write=True):
+            values = {'ai_enrich_due': False}
+            if task._ai_content_hash() != task.ai_enrich_hash:
+                try:
+                    task._auto_enrich()
+                    values['ai_enrich_hash'] = task._ai_content_hash()
+                except Exception as e:
+                    _logger.warning(f"Enrichissement automatique de la tâche {task.id} échoué : {e}")
+                    self.env.cr.rollback()
+                    # Nouvel essai après le délai (quota, fournisseur indisponible...)
+                    values['ai_enrich_due'] = fields.Datetime.now() + timedelta(seconds=delay)
+            task.write(values)
+            # Valider tâche par tâche : un échec ne perd pas les précédentes
+            self.env.cr.commit()
+        return True
+    
+    def _auto_enrich(self):
+        """Génère ce qui manque : description si vide, puis sous-tâches, durée et priorité"""
+        self.ensure_one()
+        steps = [self.action_generate_ai_subtasks, self.action_estimate_duration, self.action_suggest_priority]
+        if not self.description:
+            steps.insert(0, self.action_generate_ai_description)
+        for step in steps:
+            result = step()
+            # Ces actions signalent l'échec par une notification, sans lever :
+            # on lève pour que le cron reprogramme la tâche au lieu de la marquer enrichie
+            if isinstance(result, dict) and result.get('params', {}).get('type') == 'danger':
+                raise UserError(result['params'].get('message') or "Échec de l'enrichissement IA")
+    
+    def _call_ai(self, prompt, config, generation_type=None):
+        """
+        Appelle l'API Google Gemini (100% gratuit) via le transport IA
+        (appel réel, enregistrement ou rejeu d'une cassette), avec le modèle
+        choisi par le routeur pour ce type de génération (config['model'])
         Retourne: (response_text, tokens_used)
         """
-        # Récupérer la clé API Gemini
-        api_key = config.get('api_key') or os.environ.get('GEMINI_API_KEY')
+        # Modèle choisi pour ce type de génération (enregistré dans l'historique) ;
+        # échoue sans appel réseau si les sondes de santé signalent une panne,
+        # et l'échec est alors journalisé sans modèle (aucun n'a été appelé)
+        config['model'] = False
+        config['model'] = self.env['task.ai.model']._route(generation_type)
         
-        if not api_key:
-            raise UserError(
-                "❌ Clé API Gemini non configurée!\n\n"
-                "1. Obtenez une clé GRATUITE:\n"
-                "   https://makersuite.google.com/app/apikey\n\n"
-                "2. Dans Odoo:\n"
-                "   Paramètres → Technique → Paramètres système\n"
-                "   Créez: task_manager.gemini_api_key\n\n"
-                "3. Redémarrez et testez!"
-            )
+        # Vérifier les budgets de tokens (compteurs précalculés)
+        Budget = self.env['task.ai.budget']
+        budgets = Budget.check_budget(estimated_tokens=len(prompt) // 4)
         
+        # Seuls les échecs du fournisseur pénalisent le modèle dans le routage :
+        # une erreur de configuration (clé, SDK, mode, cassette) ne dit rien de lui
+        config['provider_error'] = False
+        api_key = config.get('api_key') or os.environ.get('GEMINI_API_KEY')
         try:
-            # Appeler Gemini
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-flash-latest')
-            response = model.generate_content(prompt)
-            return (response.text, 0)
+            text, tokens = self.env['task.ai.transport'].send(
+                prompt, api_key=api_key, generation_type=generation_type, model_name=config['model']
+            )
+        except AIProviderError as e:
+            config['provider_error'] = True
+            _logger.error(f"Erreur Gemini: {e}")
+            raise
+        except UserError:
+            raise
         except Exception as e:
+            config['provider_error'] = True
             _logger.error(f"Erreur Gemini: {e}")
             raise UserError(f"❌ Erreur Gemini: {str(e)}")
+        
+        budgets._consume(tokens)
+        return (text, tokens)
     
     def action_generate_ai_description(self):
         """
@@ -230,15 +821,21 @@ Génère une description professionnelle et détaillée de cette tâche qui expl
 Sois concis mais complet (maximum 200 mots).
 Réponds en français, sans introduction ni conclusion."""
         
+        # Requête identique en cours ou tout juste terminée : on réutilise son résultat
+        if self._ai_single_flight('description', prompt):
+            return self._ai_reused_result()
+        
         start_time = time.time()
         
         try:
             # Utiliser Gemini via _call_ai
-            description, tokens = self._call_ai(prompt, config)
+            description, tokens = self._call_ai(prompt, config, 'description')
             execution_time = time.time() - start_time
             
             # Mettre à jour la tâche
-            self.write({'description': description})
+            self.with_context(task_manager_ai_write=True).write(
+                dict(self._ai_fingerprint('description'), description=description)
+            )
             
             # Logger dans l'historique
             self.env['task.ai.history'].create_log(
@@ -249,12 +846,20 @@ Réponds en français, sans introduction ni conclusion."""
                 success=True,
                 tokens=tokens,
                 exec_time=execution_time,
-                model='gemini-pro'
+                model=config['model']
             )
             
+            self._notify_ai_update(['description'])
+            
             return {
                 'type': 'ir.actions.client',
-                'tag': 'reload',
+                'tag': 'display_notification',
+                'params': {
+                    'title': '✅ Description générée !',
+                    'message': 'La description a été mise à jour.',
+                    'type': 'success',
+                    'sticky': False,
+                }
             }
             
         except Exception as e:
@@ -268,7 +873,9 @@ Réponds en français, sans introduction ni conclusion."""
                 response='',
                 success=False,
                 error=str(e),
-                exec_time=time.time() - start_time
+                exec_time=time.time() - start_time,
+                model=config.get('model'),
+                provider_error=config.get('provider_error', False)
             )
             
             raise UserError(f"❌ Erreur de génération. Erreur : {str(e)}")
@@ -306,14 +913,21 @@ Exemple de format attendu :
 - Sous-tâche 2
 - Sous-tâche 3"""
         
+        # Requête identique en cours ou tout juste terminée : on réutilise son résultat
+        if self._ai_single_flight('subtasks', prompt):
+            return self._ai_reused_result()
+        
         start_time = time.time()
         
         try:
             # Utiliser Gemini via _call_ai
-            subtasks, tokens = self._call_ai(prompt, config)
+            subtasks, tokens = self._call_ai(prompt, config, 'subtasks')
             execution_time = time.time() - start_time
             
-            self.write({'subtasks': subtasks})
+            self.with_context(task_manager_ai_write=True).write(
+                dict(self._ai_fingerprint('subtasks'), subtasks=subtasks)
+            )
+            self._materialize_subtasks(subtasks)
             
             self.env['task.ai.history'].create_log(
                 task_id=self.id,
@@ -323,12 +937,20 @@ Exemple de format attendu :
                 success=True,
                 tokens=tokens,
                 exec_time=execution_time,
-                model='gemini-flash-latest'
+                model=config['model']
             )
             
+            self._notify_ai_update(['subtasks', 'child_ids'])
+            
             return {
                 'type': 'ir.actions.client',
-                'tag': 'reload',
+                'tag': 'display_notification',
+                'params': {
+                    'title': '✅ Sous-tâches générées !',
+                    'message': 'Les sous-tâches ont été créées.',
+                    'type': 'success',
+                    'sticky': False,
+                }
             }
             
         except Exception as e:
@@ -341,7 +963,9 @@ Exemple de format attendu :
                 prompt=prompt,
                 success=False,
                 error=error_msg,
-                exec_time=time.time() - start_time
+                exec_time=time.time() - start_time,
+                model=config.get('model'),
+                provider_error=config.get('provider_error', False)
             )
             
             return {
@@ -355,6 +979,61 @@ Exemple de format attendu :
                 }
             }
     
+    @api.model
+    def _parse_subtasks_markdown(self, text):
+        """Extrait les intitulés d'une liste à puces ou numérotée (markdown)"""
+        names = []
+        for line in (text or '').splitlines():
+            match = re.match(r'^\s*(?:[-*•+]|\d+[.)])\s+(.+?)\s*$', line)
+            if match:
+                name = match.group(1).replace('**', '').strip()
+                if name and name not in names:
+                    names.append(name[:255])
+        return names
+    
+    def _materialize_subtasks(self, text, replace=True):
+        """
+        Transforme la liste de sous-tâches IA en tâches enfants, en un seul create.
+        Idempotent : les sous-tâches déjà présentes (même intitulé) sont conservées ;
+        avec replace=True, les sous-tâches IA disparues de la liste et jamais
+        démarrées sont supprimées.
+        """
+        self.ensure_one()
+        names = self._parse_subtasks_markdown(text)
+        existing = self.child_ids.filtered('ai_generated')
+        existing_names = set(existing.mapped('name'))
+        
+        if replace:
+            existing.filtered(lambda t: t.name not in names and t.state == 'new').unlink()
+        
+        deadline = self.deadline if self.deadline and self.deadline >= fields.Date.context_today(self) else False
+        children = self.create([{
+            'name': name,
+            'parent_id': self.id,
+            'ai_generated': True,
+            'user_id': self.user_id.id,
+            'team_member_id': self.team_member_id.id,
+            'required_role': self.required_role,
+            'deadline': deadline,
+            'priority': self.priority,
+        } for name in names if name not in existing_names])
+        return children
+    
+    def action_materialize_subtasks(self):
+        """Crée (ou met à jour) les sous-tâches à partir du texte actuel"""
+        self.ensure_one()
+        children = self._materialize_subtasks(self.subtasks)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': '✅ Sous-tâches créées',
+                'message': f'{len(children)} nouvelle(s) sous-tâche(s).',
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
     def action_estimate_duration(self):
         """
         Estime automatiquement la durée nécessaire pour accomplir la tâche
@@ -381,12 +1060,16 @@ Considère :
 Réponds UNIQUEMENT avec un nombre décimal (exemple: 4.5)
 Ne mets AUCUN texte avant ou après le nombre."""
         
+        # Requête identique en cours ou tout juste terminée : on réutilise son résultat
+        if self._ai_single_flight('duration', prompt):
+            return self._ai_reused_result()
+        
         start_time = time.time()
         
         
         try:
             # Utiliser Gemini via _call_ai
-            response_text, tokens = self._call_ai(prompt, config)
+            response_text, tokens = self._call_ai(prompt, config, 'duration')
             
             # Extraire le nombre de la réponse
             match = re.search(r'(\d+\.?\d*)', response_text)
@@ -401,7 +1084,7 @@ Ne mets AUCUN texte avant ou après le nombre."""
             
             execution_time = time.time() - start_time
             
-            self.write({'estimated_hours': estimated_hours})
+            self.write(dict(self._ai_fingerprint('duration'), estimated_hours=estimated_hours))
             
             self.env['task.ai.history'].create_log(
                 task_id=self.id,
@@ -411,9 +1094,11 @@ Ne mets AUCUN texte avant ou après le nombre."""
                 success=True,
                 tokens=tokens,
                 exec_time=execution_time,
-                model='gemini-flash-latest'
+                model=config['model']
             )
             
+            self._notify_ai_update(['estimated_hours'])
+            
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
@@ -435,7 +1120,9 @@ Ne mets AUCUN texte avant ou après le nombre."""
                 prompt=prompt,
                 success=False,
                 error=error_msg,
-                exec_time=time.time() - start_time
+                exec_time=time.time() - start_time,
+                model=config.get('model'),
+                provider_error=config.get('provider_error', False)
             )
             
             return {
@@ -476,11 +1163,15 @@ Critères :
 Réponds UNIQUEMENT avec : low, medium, ou high
 Ne mets AUCUN autre texte."""
         
+        # Requête identique en cours ou tout juste terminée : on réutilise son résultat
+        if self._ai_single_flight('priority', prompt):
+            return self._ai_reused_result()
+        
         start_time = time.time()
         
         try:
             # Utiliser Gemini via _call_ai
-            suggested_priority, tokens = self._call_ai(prompt, config)
+            suggested_priority, tokens = self._call_ai(prompt, config, 'priority')
             suggested_priority = suggested_priority.strip().lower()
             
             # Validation
@@ -502,11 +1193,19 @@ Ne mets AUCUN autre texte."""
             
             
             # Appliquer directement la priorité
-            self.write({'priority': suggested_priority})
+            self.write(dict(self._ai_fingerprint('priority'), priority=suggested_priority))
+            
+            self._notify_ai_update(['priority'])
             
             return {
                 'type': 'ir.actions.client',
-                'tag': 'reload',
+                'tag': 'display_notification',
+                'params': {
+                    'title': '✅ Priorité suggérée !',
+                    'message': f'Priorité : {suggested_priority}',
+                    'type': 'success',
+                    'sticky': False,
+                }
             }
             
         except Exception as e:
@@ -519,7 +1218,9 @@ Ne mets AUCUN autre texte."""
                 prompt=prompt,
                 success=False,
                 error=error_msg,
-                exec_time=time.time() - start_time
+                exec_time=time.time() - start_time,
+                model=config.get('model'),
+                provider_error=config.get('provider_error', False)
             )
             
             return {
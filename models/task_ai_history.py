@@ -1,17 +1,19 @@
 # -*- coding: utf-8 -*-
+import hashlib
 from odoo import models, fields, api
+from odoo.tools import SQL
 
 class TaskAIHistory(models.Model):
     """Historique des générations IA pour traçabilité et debug"""
     _name = 'task.ai.history'
     _description = 'Historique des Générations IA'
-    _order = 'generation_date desc'
+    _order = 'generation_date desc, id desc'
     
     task_id = fields.Many2one(
         'task.manager.task',
         string='Tâche',
-        required=True,
-        ondelete='cascade'
+        ondelete='cascade',
+        help='Vide pour un appel portant sur un lot de tâches (tri des emails)'
     )
     
     generation_type = fields.Selection([
@@ -20,14 +22,17 @@ class TaskAIHistory(models.Model):
         ('duration', 'Estimation Durée'),
         ('priority', 'Suggestion Priorité'),
         ('complete', 'Génération Complète'),
+        ('triage', 'Tri des Emails'),
     ], string='Type de Génération', required=True)
     
     prompt_sent = fields.Text(
+        prefetch='body',
         string='Prompt Envoyé',
         help='Le prompt envoyé à Claude'
     )
     
     response_received = fields.Text(
+        prefetch='body',
         string='Réponse Reçue',
         help='La réponse complète de Claude'
     )
@@ -35,7 +40,8 @@ class TaskAIHistory(models.Model):
     generation_date = fields.Datetime(
         string='Date de Génération',
         default=fields.Datetime.now,
-        required=True
+        required=True,
+        index=True
     )
     
     success = fields.Boolean(
@@ -60,23 +66,92 @@ class TaskAIHistory(models.Model):
     
     model_used = fields.Char(
         string='Modèle Utilisé',
-        help='Quel modèle Claude a été utilisé'
+        help='Modèle effectivement appelé (choisi par le routeur)'
+    )
+    
+    provider_error = fields.Boolean(
+        string='Erreur Fournisseur',
+        readonly=True,
+        help='Échec du fournisseur IA lui-même (pas un refus de budget, de quota ou de santé, ni une réponse illisible)'
     )
     
+    prompt_hash = fields.Char(
+        string='Empreinte du Prompt',
+        index=True,
+        readonly=True,
+        help='SHA-256 du prompt : repère les appels identiques concurrents'
+    )
+    
+    # Historique d'une tâche, page par page, du plus récent au plus ancien
+    _task_generation_date_idx = models.Index("(task_id, generation_date DESC, id DESC)")
+    
+    # Exports incrémentaux ordonnés par (write_date, id)
+    _write_date_id_idx = models.Index("(write_date, id)")
+    
+    # ========== COMPTEUR DES TÂCHES ==========
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        logs = super().create(vals_list)
+        self._update_suggestion_counts(logs.filtered('success'), 1)
+        return logs
+    
+    def write(self, vals):
+        # Changer de tâche ou de statut : retirer l'ancienne contribution, ajouter la nouvelle
+        counted = 'success' in vals or 'task_id' in vals
+        if counted:
+            self._update_suggestion_counts(self.filtered('success'), -1)
+        res = super().write(vals)
+        if counted:
+            self._update_suggestion_counts(self.filtered('success'), 1)
+        return res
+    
+    def unlink(self):
+        self._update_suggestion_counts(self.filtered('success'), -1)
+        return super().unlink()
+    
+    @api.model
+    def _update_suggestion_counts(self, logs, sign):
+        """Maintient task.manager.task.ai_suggestion_count sans relire l'historique"""
+        counts = {}
+        for log in logs.filtered('task_id'):
+            counts[log.task_id.id] = counts.get(log.task_id.id, 0) + sign
+        if not counts:
+            return
+        Task = self.env['task.manager.task']
+        Task.flush_model(['ai_suggestion_count'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_manager_task t
+               SET ai_suggestion_count = GREATEST(COALESCE(t.ai_suggestion_count, 0) + d.delta, 0)
+              FROM unnest(%s::int[], %s::int[]) AS d(id, delta)
+             WHERE t.id = d.id
+            """,
+            list(counts), list(counts.values()),
+        ))
+        Task.browse(counts).invalidate_recordset(['ai_suggestion_count'])
+    
+    @api.model
+    def _prompt_hash(self, prompt):
+        return hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+    
     @api.model
     def create_log(self, task_id, generation_type, prompt, response=None, 
-                   success=False, error=None, tokens=0, exec_time=0.0, model=''):
+                   success=False, error=None, tokens=0, exec_time=0.0, model='',
+                   provider_error=False):
         """Méthode helper pour créer un log rapidement"""
         return self.create({
             'task_id': task_id,
             'generation_type': generation_type,
             'prompt_sent': prompt,
+            'prompt_hash': self._prompt_hash(prompt),
             'response_received': response,
             'success': success,
             'error_message': error,
             'tokens_used': tokens,
             'execution_time': exec_time,
             'model_used': model,
+            'provider_error': provider_error,
         })
     
     @api.model
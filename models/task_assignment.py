@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import heapq
+import logging
+from collections import defaultdict
+from odoo import models, api
+
+_logger = logging.getLogger(__name__)
+
+# Charge appliquée aux tâches sans estimation pour qu'elles comptent malgré tout
+DEFAULT_TASK_HOURS = 1.0
+
+
+class TaskAssignmentEngine(models.AbstractModel):
+    """Répartition automatique des tâches selon la charge des membres"""
+    _name = 'task.manager.assignment'
+    _description = 'Task Manager - Moteur d\'assignation'
+
+    @api.model
+    def assign_tasks(self, tasks):
+        """
+        Assigne les tâches sans membre aux membres actifs.
+
+        - Les tâches sont traitées par échéance croissante (sans échéance en
+          dernier), puis priorité décroissante, puis durée décroissante.
+        - Chaque tâche va au membre le moins chargé (charge restante rapportée
+          à sa capacité journalière) parmi ceux du rôle requis.
+        - Un tas par rôle plus un tas global : O(T log M) pour T tâches et
+          M membres, les entrées périmées sont ignorées à la sortie du tas.
+
+        Retourne {membre_id: [task_ids]}.
+        """
+        tasks = tasks.filtered(lambda t: not t.team_member_id and t.state != 'done')
+        if not tasks:
+            return {}
+
+        members = self.env['task.manager.team.member'].search_read(
+            [('active', '=', True)],
+            ['role', 'open_estimated_hours', 'daily_capacity_hours'],
+        )
+        if not members:
+            _logger.info("Assignation automatique : aucun membre actif")
+            return {}
+
+        hours = {}
+        capacity = {}
+        roles = {}
+        heaps = defaultdict(list)
+        for member in members:
+            hours[member['id']] = member['open_estimated_hours']
+            capacity[member['id']] = member['daily_capacity_hours'] or 1.0
+            roles[member['id']] = member['role']
+            load = hours[member['id']] / capacity[member['id']]
+            heaps[member['role']].append((load, member['id']))
+            heaps[None].append((load, member['id']))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        def sort_key(task):
+            return (
+                not task.deadline,
+                task.deadline or False,
+                {'high': 0, 'medium': 1, 'low': 2}.get(task.priority, 1),
+                -task.estimated_hours,
+                task.id,
+            )
+
+        assignments = defaultdict(list)
+        for task in tasks.sorted(sort_key):
+            heap = heaps.get(task.required_role) if task.required_role else heaps[None]
+            if not heap:
+                continue
+            member_id = self._pop_least_loaded(heap, hours, capacity)
+            assignments[member_id].append(task.id)
+            hours[member_id] += task.estimated_hours or DEFAULT_TASK_HOURS
+            load = hours[member_id] / capacity[member_id]
+            heapq.heappush(heap, (load, member_id))
+            # Le membre figure aussi dans l'autre tas : on y pousse sa nouvelle charge
+            other = heaps[None] if task.required_role else heaps[roles[member_id]]
+            heapq.heappush(other, (load, member_id))
+
+        # Une écriture par membre
+        Task = self.env['task.manager.task']
+        for member_id, task_ids in assignments.items():
+            Task.browse(task_ids).write({'team_member_id': member_id})
+        _logger.info(f"Assignation automatique : {len(tasks)} tâches réparties sur {len(assignments)} membres")
+        return dict(assignments)
+
+    @staticmethod
+    def _pop_least_loaded(heap, hours, capacity):
+        """Dépile le membre le moins chargé en ignorant les entrées périmées"""
+        while True:
+            load, member_id = heapq.heappop(heap)
+            if load == hours[member_id] / capacity[member_id]:
+                return member_id
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Modèles exportables (nom court utilisé par la commande -> modèle Odoo)
+EXPORTABLE_MODELS = {
+    'task': 'task.manager.task',
+    'history': 'task.ai.history',
+}
+
+# Type Odoo -> type Arrow (construit à la demande, pyarrow étant optionnel)
+_ARROW_TYPES = {
+    'integer': 'int64',
+    'many2one': 'int64',
+    'float': 'float64',
+    'monetary': 'float64',
+    'boolean': 'bool_',
+    'date': 'date32',
+}
+
+
+class TaskManagerExport(models.AbstractModel):
+    """
+    Export en flux des tâches et de l'historique IA (JSONL ou Parquet).
+
+    Les lignes sont lues par lots via un curseur côté serveur, dans l'ordre
+    (write_date, id) : la mémoire reste constante quel que soit le volume.
+
+    write_date est l'heure de début de la transaction d'écriture : une longue
+    transaction peut valider des lignes plus anciennes que la marque déjà
+    remise. Les reprises relisent donc task_manager.export_overlap secondes
+    avant la marque ; le flux est « au moins une fois » et le consommateur
+    dédoublonne sur (id, write_date).
+    """
+    _name = 'task.manager.export'
+    _description = 'Task Manager - Export en flux'
+
+    @api.model
+    def _get_model(self, model_key):
+        if model_key not in EXPORTABLE_MODELS:
+            raise UserError(f"❌ Modèle non exportable : {model_key} (choix : {', '.join(EXPORTABLE_MODELS)})")
+        return self.env[EXPORTABLE_MODELS[model_key]]
+
+    @api.model
+    def _exportable_columns(self, model_key):
+        """Champs stockés en colonne (les one2many / many2many sont exclus)"""
+        Model = self._get_model(model_key)
+        return [name for name, field in Model._fields.items() if field.store and field.column_type]
+
+    @api.model
+    def _stream_batches(self, model_key, columns=None, since=None, batch_size=5000):
+        """Génère des lots de lignes (dictionnaires) modifiées après `since`"""
+        Model = self._get_model(model_key)
+        available = self._exportable_columns(model_key)
+        columns = columns or available
+        unknown = set(columns) - set(available)
+        if unknown:
+            raise UserError(f"❌ Colonnes inconnues : {', '.join(sorted(unknown))}")
+        Model.flush_model()
+
+        where = SQL("TRUE")
+        if since:
+            overlap = int(self.env['ir.config_parameter'].sudo().get_param('task_manager.export_overlap', '600'))
+            where = SQL("write_date > %s::timestamp - make_interval(secs => %s)", since, overlap)
+        query = SQL(
+            "SELECT %s, write_date AS __watermark FROM %s WHERE %s ORDER BY write_date, id",
+            SQL(", ").join(SQL.identifier(name) for name in columns),
+            SQL.identifier(Model._table),
+            where,
+        )
+        stream = self.env.cr._cnx.cursor(name=f'task_manager_export_{model_key}')
+        stream.itersize = batch_size
+        try:
+            stream.execute(query.code, query.params)
+            while True:
+                rows = stream.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(zip(columns + ['__watermark'], row)) for row in rows]
+        finally:
+            stream.close()
+
+    @api.model
+    def export(self, model_key, output, fmt='jsonl', columns=None, since=None,
+               batch_size=5000, incremental=False):
+        """
+        Exporte `model_key` vers le fichier `output`.
+
+        - fmt : 'jsonl' ou 'parquet' (nécessite pyarrow)
+        - since : n'exporte que les lignes modifiées après cette date
+        - incremental : reprend depuis le dernier export et mémorise la
+          nouvelle marque (paramètre task_manager.export_watermark.<modèle>)
+
+        Retourne (nombre de lignes, marque de fin).
+        """
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        param = f'task_manager.export_watermark.{model_key}'
+        if incremental and not since:
+            since = IrConfigParam.get_param(param) or None
+        columns = list(columns or self._exportable_columns(model_key))
+        if incremental:
+            # Clé de dédoublonnage des lignes relues dans la marge de recouvrement
+            columns += [name for name in ('id', 'write_date') if name not in columns]
+
+        batches = self._stream_batches(model_key, columns, since, batch_size)
+        if fmt == 'jsonl':
+            count, watermark = self._write_jsonl(batches, output)
+        elif fmt == 'parquet':
+            count, watermark = self._write_parquet(batches, output, model_key, columns)
+        else:
+            raise UserError(f"❌ Format inconnu : {fmt} (jsonl ou parquet)")
+
+        watermark = watermark and fields.Datetime.to_string(watermark)
+        if incremental and watermark:
+            IrConfigParam.set_param(param, watermark)
+        _logger.info(f"Export {model_key} ({fmt}) : {count} lignes, marque {watermark or since}")
+        return count, watermark or since
+
+    @api.model
+    def _write_jsonl(self, batches, output):
+        count, watermark = 0, None
+        with open(output, 'w', encoding='utf-8') as stream:
+            for batch in batches:
+                for row in batch:
+                    watermark = row.pop('__watermark')
+                    stream.write(json.dumps(row, default=str, ensure_ascii=False))
+                    stream.write('\n')
+                count += len(batch)
+        return count, watermark
+
+    @api.model
+    def _write_parquet(self, batches, output, model_key, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise UserError("❌ L'export Parquet nécessite pyarrow : pip install pyarrow")
+
+        Model = self._get_model(model_key)
+        schema = pa.schema([
+            (name, self._arrow_type(pa, Model._fields[name].type)) for name in columns
+        ])
+        count, watermark = 0, None
+        with pq.ParquetWriter(output, schema) as writer:
+            for batch in batches:
+                watermark = batch[-1]['__watermark']
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+        return count, watermark
+
+    @staticmethod
+    def _arrow_type(pa, field_type):
+        if field_type == 'datetime':
+            return pa.timestamp('us')
+        return getattr(pa, _ARROW_TYPES.get(field_type, 'string'))()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from markupsafe import Markup
+from odoo import models, fields, api
+from odoo.tools import SQL, split_every
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskManagerReminder(models.AbstractModel):
+    """
+    Rappels des tâches en retard ou proches de leur échéance.
+
+    Tout est ensembliste : une requête (index partiel sur deadline) choisit
+    les tâches sans rappel en cours, les activités sont créées par lots et
+    chaque membre reçoit un seul récapitulatif au lieu d'un mail par tâche.
+    """
+    _name = 'task.manager.reminder'
+    _description = 'Task Manager - Rappels des échéances'
+
+    @api.model
+    def _cron_send_reminders(self):
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        days_ahead = int(IrConfigParam.get_param('task_manager.reminder_days_ahead', '2'))
+        batch_size = int(IrConfigParam.get_param('task_manager.reminder_batch', '1000'))
+        today = fields.Date.context_today(self)
+
+        self._refresh_overdue_flags(today)
+        rows = self._select_due_tasks(today + timedelta(days=days_ahead))
+        if not rows:
+            return True
+
+        activity_type = self.env.ref('ai_task_manager.mail_activity_type_task_deadline')
+        res_model_id = self.env['ir.model']._get_id('task.manager.task')
+        Activity = self.env['mail.activity'].sudo().with_context(
+            # Pas de mail par activité : les membres reçoivent un récapitulatif
+            mail_activity_quick_update=True,
+            mail_create_nosubscribe=True,
+        )
+        for batch in split_every(batch_size, rows):
+            Activity.create([{
+                'res_model_id': res_model_id,
+                'res_id': task_id,
+                'activity_type_id': activity_type.id,
+                'user_id': user_id,
+                'date_deadline': deadline,
+                'summary': "Tâche en retard" if deadline < today else "Échéance proche",
+            } for task_id, name, deadline, user_id, member_id in batch])
+
+        digests = defaultdict(list)
+        for task_id, name, deadline, user_id, member_id in rows:
+            if member_id:
+                digests[member_id].append((name, deadline))
+        self._send_digests(digests, today)
+
+        _logger.info(f"Rappels d'échéance : {len(rows)} activités, {len(digests)} récapitulatifs")
+        return True
+
+    @api.model
+    def _refresh_overdue_flags(self, today):
+        """
+        is_overdue dépend de la date du jour : les tâches passées en retard
+        depuis hier sont marquées en une requête (index partiel sur deadline).
+        """
+        Task = self.env['task.manager.task']
+        Task.flush_model(['deadline', 'state', 'is_overdue'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_manager_task
+               SET is_overdue = TRUE
+             WHERE deadline < %s AND state != 'done' AND active AND is_overdue IS NOT TRUE
+            """,
+            today,
+        ))
+        if self.env.cr.rowcount:
+            Task.invalidate_model(['is_overdue'])
+
+    @api.model
+    def _select_due_tasks(self, limit_date):
+        """(id, nom, échéance, utilisateur, membre) des tâches à rappeler"""
+        self.env['task.manager.task'].flush_model()
+        self.env['mail.activity'].flush_model()
+        activity_type = self.env.ref('ai_task_manager.mail_activity_type_task_deadline')
+        self.env.cr.execute(SQL(
+            """
+            SELECT t.id, t.name, t.deadline, COALESCE(t.user_id, m.user_id), t.team_member_id
+              FROM task_manager_task t
+              LEFT JOIN task_manager_team_member m ON m.id = t.team_member_id
+             WHERE t.deadline <= %(limit_date)s AND t.state != 'done' AND t.active
+               AND COALESCE(t.user_id, m.user_id) IS NOT NULL
+               AND NOT EXISTS (
+                   SELECT 1 FROM mail_activity a
+                    WHERE a.res_model = 'task.manager.task' AND a.res_id = t.id
+                      AND a.activity_type_id = %(type_id)s AND a.active
+               )
+             ORDER BY t.deadline, t.id
+            """,
+            limit_date=limit_date,
+            type_id=activity_type.id,
+        ))
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _send_digests(self, digests, today):
+        """Un mail par membre listant ses tâches en retard puis à échéance proche"""
+        members = self.env['task.manager.team.member'].browse(list(digests)).exists()
+        vals_list = []
+        for member in members:
+            recipient = member.user_id.partner_id
+            if not recipient and not member.email:
+                continue
+            tasks = sorted(digests[member.id], key=lambda item: item[1])
+            items = Markup().join(
+                Markup("<li>%s — %s%s</li>") % (
+                    name,
+                    fields.Date.to_string(deadline),
+                    Markup(" <b>(en retard)</b>") if deadline < today else "",
+                )
+                for name, deadline in tasks
+            )
+            overdue = sum(1 for name, deadline in tasks if deadline < today)
+            vals = {
+                'subject': f"Task Manager : {overdue} tâche(s) en retard, {len(tasks) - overdue} à échéance proche",
+                'body_html': Markup("<p>Bonjour %s,</p><p>Tâches demandant votre attention :</p><ul>%s</ul>") % (
+                    member.name, items,
+                ),
+                'auto_delete': True,
+            }
+            if recipient:
+                vals['recipient_ids'] = [(4, recipient.id)]
+            else:
+                vals['email_to'] = member.email
+            vals_list.append(vals)
+        if vals_list:
+            self.env['mail.mail'].sudo().create(vals_list)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Clé de conflit : doit reprendre exactement les expressions de l'index unique
+_REPORT_KEY = SQL(
+    "(day, state, priority, (COALESCE(team_member_id, 0)), "
+    "(COALESCE(deadline_bucket, '1970-01-01'::date)))"
+)
+
+
+class TaskManagerTaskReport(models.Model):
+    """
+    Agrégats des tâches pour le tableau de bord.
+
+    Une ligne par (jour de création, état, priorité, membre, semaine d'échéance).
+    La table est tenue à jour par deltas à chaque création, modification ou
+    suppression de tâche : le tableau de bord ne lit que ces agrégats et son
+    coût ne dépend plus du nombre de tâches.
+    """
+    _name = 'task.manager.task.report'
+    _description = 'Task Manager - Statistiques des tâches'
+    _log_access = False
+    _order = 'day desc'
+
+    day = fields.Date(string='Jour de création', readonly=True, index=True)
+
+    state = fields.Selection(
+        selection=lambda self: self.env['task.manager.task']._fields['state'].selection,
+        string='État',
+        readonly=True
+    )
+
+    priority = fields.Selection(
+        selection=lambda self: self.env['task.manager.task']._fields['priority'].selection,
+        string='Priorité',
+        readonly=True
+    )
+
+    team_member_id = fields.Many2one(
+        'task.manager.team.member',
+        string='Membre d\'équipe',
+        ondelete='cascade',
+        readonly=True
+    )
+
+    deadline_bucket = fields.Date(
+        string='Semaine d\'échéance',
+        readonly=True,
+        help="Lundi de la semaine de la date limite"
+    )
+
+    task_count = fields.Integer(string='Nombre de tâches', readonly=True)
+
+    estimated_hours = fields.Float(string='Heures estimées', readonly=True)
+
+    _key_uniq = models.UniqueIndex(
+        "(day, state, priority, COALESCE(team_member_id, 0), "
+        "COALESCE(deadline_bucket, '1970-01-01'::date))"
+    )
+
+    def init(self):
+        """Remplit la table à l'installation (ou si elle a été vidée)"""
+        self.env.cr.execute("SELECT 1 FROM task_manager_task_report LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._refresh_full()
+
+    # ========== CALCUL DES CLÉS ==========
+
+    @api.model
+    def _task_key(self, task):
+        """Clé d'agrégation d'une tâche, None si elle n'est pas comptée"""
+        if not task.active or not task.create_date:
+            return None
+        deadline = task.deadline
+        bucket = deadline - timedelta(days=deadline.weekday()) if deadline else None
+        return (
+            task.create_date.date(),
+            task.state,
+            task.priority,
+            task.team_member_id.id or None,
+            bucket,
+        )
+
+    @api.model
+    def _collect(self, tasks, sign, deltas=None):
+        """Ajoute (sign=1) ou retire (sign=-1) les tâches aux deltas {clé: [nombre, heures]}"""
+        deltas = deltas if deltas is not None else defaultdict(lambda: [0, 0.0])
+        for task in tasks:
+            key = self._task_key(task)
+            if key:
+                deltas[key][0] += sign
+                deltas[key][1] += sign * (task.estimated_hours or 0.0)
+        return deltas
+
+    # ========== MISE À JOUR ==========
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Applique les deltas en une requête INSERT ... ON CONFLICT"""
+        rows = [(key, values) for key, values in deltas.items() if values[0] or values[1]]
+        if not rows:
+            return
+        columns = list(zip(*(key + tuple(values) for key, values in rows)))
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO task_manager_task_report AS r
+                   (day, state, priority, team_member_id, deadline_bucket, task_count, estimated_hours)
+            SELECT * FROM unnest(%s::date[], %s::varchar[], %s::varchar[], %s::int[],
+                                 %s::date[], %s::int[], %s::float8[])
+            ON CONFLICT %s DO UPDATE
+               SET task_count = r.task_count + EXCLUDED.task_count,
+                   estimated_hours = r.estimated_hours + EXCLUDED.estimated_hours
+            """,
+            *(list(column) for column in columns), _REPORT_KEY,
+        ))
+        self.env.cr.execute(SQL(
+            "DELETE FROM task_manager_task_report WHERE task_count <= 0 AND day = ANY(%s)",
+            list(columns[0]),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_full(self):
+        """Reconstruit toute la table (installation, réparation, import massif)"""
+        self.env['task.manager.task'].flush_model()
+        self.env.cr.execute("DELETE FROM task_manager_task_report")
+        self.env.cr.execute("""
+            INSERT INTO task_manager_task_report
+                   (day, state, priority, team_member_id, deadline_bucket, task_count, estimated_hours)
+            SELECT create_date::date, state, priority, team_member_id,
+                   date_trunc('week', deadline)::date, COUNT(*), COALESCE(SUM(estimated_hours), 0)
+              FROM task_manager_task
+             WHERE active AND create_date IS NOT NULL
+             GROUP BY 1, 2, 3, 4, 5
+        """)
+        self.invalidate_model()
+        _logger.info("Statistiques des tâches reconstruites")
+        return True
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+from collections import defaultdict, deque
+from datetime import timedelta
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Capacité utilisée pour les tâches sans membre (ou membre sans capacité)
+DEFAULT_DAILY_CAPACITY = 8.0
+
+
+class TaskScheduler(models.AbstractModel):
+    """
+    Prévision du planning à partir des dépendances entre tâches.
+
+    Toutes les dates sont manipulées en jours relatifs à aujourd'hui :
+    - début au plus tôt (ES) = max des fins au plus tôt des prédécesseurs ;
+    - fin au plus tôt (EF) = ES + durée, la durée étant les heures estimées
+      divisées par la capacité journalière du membre assigné ;
+    - fin au plus tard (LF) = min(début au plus tard des successeurs,
+      lendemain de la date limite, horizon du planning) ;
+    - marge = LF - EF, la tâche est critique si la marge est nulle ou négative.
+
+    Les tâches terminées ou archivées ne contraignent pas leurs successeurs.
+    """
+    _name = 'task.manager.scheduler'
+    _description = 'Task Manager - Prévision du planning'
+
+    # ========== POINTS D'ENTRÉE ==========
+
+    @api.model
+    def recompute_schedule(self):
+        """Recalcule le planning complet (cron quotidien ou action manuelle)"""
+        self.env['task.manager.team.member'].flush_model(['daily_capacity_hours'])
+        self.env['task.manager.task'].flush_model()
+        today = fields.Date.context_today(self)
+        nodes = self._load_nodes(today)
+        succ, pred = self._load_edges(nodes)
+        order = self._topological_order(nodes, succ, pred)
+
+        early = self._forward_pass(order, nodes, pred, {})
+        horizon = max((ef for es, ef in early.values()), default=0)
+        slack = self._backward_pass(order, nodes, succ, early, horizon, {})
+
+        self._store(today, nodes, early, slack)
+        self._clear_closed_tasks()
+        self.env['ir.config_parameter'].sudo().set_param(
+            'task_manager.schedule_horizon', fields.Date.to_string(today + timedelta(days=horizon))
+        )
+        _logger.info(f"Planning recalculé : {len(order)} tâches, horizon J+{horizon}")
+        return True
+
+    @api.model
+    def recompute_from(self, task_ids):
+        """
+        Recalcul incrémental après modification de quelques tâches : les dates
+        ne sont recalculées que pour leurs descendants, les marges pour leurs
+        descendants et ancêtres. Les valeurs stockées servent de frontière.
+        Si l'horizon du planning bouge, toutes les marges changent : on
+        bascule alors sur un recalcul complet.
+        """
+        if not task_ids:
+            return True
+        self.env['task.manager.team.member'].flush_model(['daily_capacity_hours'])
+        self.env['task.manager.task'].flush_model()
+        today = fields.Date.context_today(self)
+        horizon_param = self.env['ir.config_parameter'].sudo().get_param('task_manager.schedule_horizon')
+        if not horizon_param:
+            return self.recompute_schedule()
+        horizon = (fields.Date.to_date(horizon_param) - today).days
+
+        descendants = self._walk(task_ids, downward=True)
+        ancestors = self._walk(task_ids, downward=False)
+        affected = descendants | ancestors
+
+        # Noeuds concernés + frontière (voisins directs dont on relit l'état stocké)
+        neighbours = self._neighbours(affected)
+        nodes = self._load_nodes(today, affected | neighbours)
+        succ, pred = self._load_edges(nodes, partial=True)
+
+        sub_order = self._topological_order(
+            {nid: nodes[nid] for nid in affected if nid in nodes}, succ, pred
+        )
+        boundary = {
+            nid: (node['es'], node['es'] + node['duration'], node['es'] + node['slack'])
+            for nid, node in nodes.items()
+            if nid not in descendants and node['es'] is not None
+        }
+
+        down_order = [nid for nid in sub_order if nid in descendants]
+        early = self._forward_pass(down_order, nodes, pred, boundary)
+        for nid in sub_order:
+            if nid not in early:
+                early[nid] = boundary.get(nid, (0, nodes[nid]['duration']))[:2]
+
+        new_horizon = max(max((ef for es, ef in early.values()), default=0), 0)
+        if new_horizon > horizon or any(
+            nodes[nid]['es'] is not None and nodes[nid]['es'] + nodes[nid]['duration'] == horizon
+            and early[nid][1] < horizon
+            for nid in down_order
+        ):
+            return self.recompute_schedule()
+
+        slack = self._backward_pass(sub_order, nodes, succ, early, horizon, boundary)
+        self._store(today, nodes, early, slack)
+        self._clear_closed_tasks(task_ids)
+        return True
+
+    # ========== CHARGEMENT ==========
+
+    @api.model
+    def _load_nodes(self, today, ids=None):
+        """Charge les tâches ouvertes : durée (jours), date limite et planning stocké"""
+        where = SQL("t.active AND t.state != 'done'")
+        if ids is not None:
+            where = SQL("%s AND t.id = ANY(%s)", where, list(ids))
+        self.env.cr.execute(SQL(
+            """
+            SELECT t.id, t.estimated_hours, m.daily_capacity_hours, t.deadline,
+                   t.forecast_start, t.forecast_finish, t.forecast_slack, t.is_critical
+              FROM task_manager_task t
+              LEFT JOIN task_manager_team_member m ON m.id = t.team_member_id
+             WHERE %s
+            """,
+            where,
+        ))
+        nodes = {}
+        for tid, hours, capacity, deadline, start, finish, slack, critical in self.env.cr.fetchall():
+            capacity = capacity or DEFAULT_DAILY_CAPACITY
+            nodes[tid] = {
+                'duration': math.ceil((hours or 0.0) / capacity),
+                'deadline': (deadline - today).days + 1 if deadline else None,
+                'es': (start - today).days if start else None,
+                'slack': slack or 0,
+                'stored': (start, finish, slack, critical),
+            }
+        return nodes
+
+    @api.model
+    def _load_edges(self, nodes, partial=False):
+        """Retourne les successeurs et prédécesseurs limités aux noeuds chargés"""
+        where = SQL("")
+        if partial:
+            ids = list(nodes)
+            where = SQL("WHERE task_id = ANY(%s) AND depends_on_id = ANY(%s)", ids, ids)
+        self.env.cr.execute(SQL(
+            "SELECT task_id, depends_on_id FROM task_manager_task_dependency_rel %s", where
+        ))
+        succ = defaultdict(list)
+        pred = defaultdict(list)
+        for task_id, depends_on_id in self.env.cr.fetchall():
+            if task_id in nodes and depends_on_id in nodes:
+                succ[depends_on_id].append(task_id)
+                pred[task_id].append(depends_on_id)
+        return succ, pred
+
+    @api.model
+    def _walk(self, task_ids, downward=True):
+        """Descendants (ou ancêtres) transitifs, tâches de départ incluses"""
+        src, dst = ('depends_on_id', 'task_id') if downward else ('task_id', 'depends_on_id')
+        self.env.cr.execute(SQL(
+            """
+            WITH RECURSIVE walk(id) AS (
+                SELECT unnest(%(ids)s::int[])
+                 UNION
+                SELECT r.%(dst)s
+                  FROM task_manager_task_dependency_rel r
+                  JOIN walk w ON r.%(src)s = w.id
+            )
+            SELECT id FROM walk
+            """,
+            ids=list(task_ids), src=SQL.identifier(src), dst=SQL.identifier(dst),
+        ))
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _neighbours(self, ids):
+        self.env.cr.execute(SQL(
+            """
+            SELECT depends_on_id FROM task_manager_task_dependency_rel WHERE task_id = ANY(%(ids)s)
+             UNION
+            SELECT task_id FROM task_manager_task_dependency_rel WHERE depends_on_id = ANY(%(ids)s)
+            """,
+            ids=list(ids),
+        ))
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    # ========== ALGORITHMES ==========
+
+    @staticmethod
+    def _topological_order(nodes, succ, pred):
+        """Tri topologique de Kahn restreint à `nodes` ; ignore les cycles résiduels"""
+        indegree = {nid: sum(1 for p in pred.get(nid, ()) if p in nodes) for nid in nodes}
+        queue = deque(nid for nid, deg in indegree.items() if deg == 0)
+        order = []
+        while queue:
+            nid = queue.popleft()
+            order.append(nid)
+            for s in succ.get(nid, ()):
+                if s in indegree:
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        queue.append(s)
+        if len(order) < len(nodes):
+            _logger.warning(f"Planning : {len(nodes) - len(order)} tâches ignorées (cycle de dépendances)")
+        return order
+
+    @staticmethod
+    def _forward_pass(order, nodes, pred, boundary):
+        """Retourne {id: (ES, EF)} ; `boundary` fournit (ES, EF, LS) des noeuds non recalculés"""
+        early = {}
+        for nid in order:
+            es = 0
+            for p in pred.get(nid, ()):
+                if p in early:
+                    es = max(es, early[p][1])
+                elif p in boundary:
+                    es = max(es, boundary[p][1])
+            early[nid] = (es, es + nodes[nid]['duration'])
+        return early
+
+    @staticmethod
+    def _backward_pass(order, nodes, succ, early, horizon, boundary):
+        """Retourne {id: marge} en parcourant `order` à rebours"""
+        late_start = {}
+        slack = {}
+        for nid in reversed(order):
+            lf = horizon
+            for s in succ.get(nid, ()):
+                if s in late_start:
+                    lf = min(lf, late_start[s])
+                elif s in boundary:
+                    lf = min(lf, boundary[s][2])
+            deadline = nodes[nid]['deadline']
+            if deadline is not None:
+                lf = min(lf, deadline)
+            es, ef = early[nid]
+            late_start[nid] = lf - nodes[nid]['duration']
+            slack[nid] = lf - ef
+        return slack
+
+    # ========== ÉCRITURE ==========
+
+    @api.model
+    def _store(self, today, nodes, early, slack):
+        """Écrit en une requête les plannings qui ont changé"""
+        ids, starts, finishes, slacks, criticals = [], [], [], [], []
+        for nid, node_slack in slack.items():
+            es, ef = early[nid]
+            start = today + timedelta(days=es)
+            finish = today + timedelta(days=max(ef - 1, es))
+            critical = node_slack <= 0
+            if (start, finish, node_slack, critical) == nodes[nid]['stored']:
+                continue
+            ids.append(nid)
+            starts.append(start)
+            finishes.append(finish)
+            slacks.append(node_slack)
+            criticals.append(critical)
+        if not ids:
+            return
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_manager_task t
+               SET forecast_start = v.start, forecast_finish = v.finish,
+                   forecast_slack = v.slack, is_critical = v.critical
+              FROM unnest(%s::int[], %s::date[], %s::date[], %s::int[], %s::bool[])
+                   AS v(id, start, finish, slack, critical)
+             WHERE t.id = v.id
+            """,
+            ids, starts, finishes, slacks, criticals,
+        ))
+        self.env['task.manager.task'].invalidate_model(
+            ['forecast_start', 'forecast_finish', 'forecast_slack', 'is_critical']
+        )
+
+    @api.model
+    def _clear_closed_tasks(self, ids=None):
+        """Efface le planning des tâches terminées ou archivées"""
+        where = SQL("(t.state = 'done' OR NOT t.active) AND t.forecast_start IS NOT NULL")
+        if ids is not None:
+            where = SQL("%s AND t.id = ANY(%s)", where, list(ids))
+        self.env.cr.execute(SQL(
+            """
+            UPDATE task_manager_task t
+               SET forecast_start = NULL, forecast_finish = NULL,
+                   forecast_slack = NULL, is_critical = FALSE
+             WHERE %s
+            """,
+            where,
+        ))
+        self.env['task.manager.task'].invalidate_model(
+            ['forecast_start', 'forecast_finish', 'forecast_slack', 'is_critical']
+        )
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from odoo import models, fields, api, SUPERUSER_ID
+from odoo.exceptions import UserError
+from odoo.tools import SQL, config as odoo_config
+
+try:
+    import fcntl
+except ImportError:  # Windows : un seul processus Odoo en pratique
+    fcntl = None
+
+_logger = logging.getLogger(__name__)
+
+# Lignes parcourues par produit matriciel lors d'une recherche
+_SEARCH_CHUNK = 262144
+
+# Index ouverts : {chemin: (inode, vecteurs, ids)}
+_open_indexes = {}
+
+
+def hashing_embedding(texts, dim=128):
+    """
+    Plongement local par hachage des mots et trigrammes de caractères
+    (sans accents, en minuscules), normalisé L2. Sans modèle ni réseau :
+    rapproche les formulations voisines ; pour de la vraie sémantique
+    multilingue, brancher un modèle local via task_manager.embedding_function.
+    """
+    np = _numpy()
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+        for word in re.findall(r'\w+', text):
+            padded = f' {word} '
+            tokens = [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+            for token in tokens:
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vectors[row, value % dim] += 1.0 if value >> 63 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise UserError("❌ La recherche sémantique nécessite numpy : pip install numpy")
+    return numpy
+
+
+class TaskManagerSemanticIndex(models.AbstractModel):
+    """
+    Index vectoriel local des tâches (nom, description, sous-tâches).
+
+    Les plongements sont stockés dans des fichiers NumPy projetés en mémoire
+    (<data_dir>/task_manager/semantic_<base>/) : vectors.npy (float32,
+    une ligne par tâche), ids.npy (id de la tâche, 0 = ligne libérée) et
+    meta.json (nombre de lignes, dimension, fonction de plongement).
+    Les modifications de tâches sont reportées après validation de la
+    transaction ; une recherche est un produit matriciel par blocs suivi
+    d'un argpartition.
+    """
+    _name = 'task.manager.semantic.index'
+    _description = 'Task Manager - Index sémantique'
+
+    # Champs textuels indexés
+    _INDEXED_FIELDS = {'name', 'description', 'subtasks'}
+
+    # ========== CONFIGURATION ==========
+
+    @api.model
+    def _get_directory(self):
+        return os.path.join(odoo_config['data_dir'], 'task_manager', f'semantic_{self.env.cr.dbname}')
+
+    @api.model
+    def _get_embedding(self):
+        """(nom, fonction) : task_manager.embedding_function = 'module:fonction'"""
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        name = IrConfigParam.get_param('task_manager.embedding_function')
+        if not name:
+            dim = int(IrConfigParam.get_param('task_manager.embedding_dim', '128'))
+            return f'hashing:{dim}', lambda texts: hashing_embedding(texts, dim)
+        module_name, dummy, function_name = name.partition(':')
+        try:
+            return name, getattr(importlib.import_module(module_name), function_name)
+        except (ImportError, AttributeError) as e:
+            raise UserError(f"❌ Fonction de plongement introuvable : {name} ({e})")
+
+    @api.model
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self._get_directory(), 'meta.json'), encoding='utf-8') as meta:
+                return json.load(meta)
+        except FileNotFoundError:
+            return None
+
+    @api.model
+    def _write_meta(self, meta):
+        path = os.path.join(self._get_directory(), 'meta.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as output:
+            json.dump(meta, output)
+        os.replace(path + '.tmp', path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Verrou exclusif entre processus pour les écritures de l'index"""
+        os.makedirs(self._get_directory(), exist_ok=True)
+        with open(os.path.join(self._get_directory(), 'lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    @api.model
+    def _open(self, writable=False):
+        """(vecteurs, ids) projetés en mémoire, réouverts si les fichiers ont été remplacés"""
+        np = _numpy()
+        directory = self._get_directory()
+        vectors_path = os.path.join(directory, 'vectors.npy')
+        if writable:
+            return (np.load(vectors_path, mmap_mode='r+'),
+                    np.load(os.path.join(directory, 'ids.npy'), mmap_mode='r+'))
+        inode = os.stat(vectors_path).st_ino
+        cached = _open_indexes.get(directory)
+        if not cached or cached[0] != inode:
+            cached = _open_indexes[directory] = (
+                inode,
+                np.load(vectors_path, mmap_mode='r'),
+                np.load(os.path.join(directory, 'ids.npy'), mmap_mode='r'),
+            )
+        return cached[1], cached[2]
+
+    @api.model
+    def _allocate(self, capacity, dim, vectors=None, ids=None, count=0):
+        """Crée (ou agrandit) les fichiers de l'index, remplacés atomiquement"""
+        np = _numpy()
+        directory = self._get_directory()
+        new_vectors = np.lib.format.open_memmap(
+            os.path.join(directory, 'vectors.npy.tmp'), mode='w+', dtype=np.float32, shape=(capacity, dim))
+        new_ids = np.lib.format.open_memmap(
+            os.path.join(directory, 'ids.npy.tmp'), mode='w+', dtype=np.int32, shape=(capacity,))
+        if count:
+            new_vectors[:count] = vectors[:count]
+            new_ids[:count] = ids[:count]
+        new_vectors.flush()
+        new_ids.flush()
+        for name in ('vectors.npy', 'ids.npy'):
+            os.replace(os.path.join(directory, name + '.tmp'), os.path.join(directory, name))
+        return self._open(writable=True)
+
+    # ========== TEXTES ==========
+
+    @api.model
+    def _iter_texts(self, task_ids=None, batch_size=2000):
+        """Lots de (ids, textes) des tâches actives, lus par un curseur serveur"""
+        self.env['task.manager.task'].flush_model(self._INDEXED_FIELDS | {'active'})
+        where = SQL("active")
+        if task_ids is not None:
+            where = SQL("active AND id = ANY(%s)", list(task_ids))
+        query = SQL(
+            "SELECT id, concat_ws(E'\\n', name, description, subtasks) FROM task_manager_task WHERE %s ORDER BY id",
+            where,
+        )
+        stream = self.env.cr._cnx.cursor(name='task_manager_semantic_index')
+        stream.itersize = batch_size
+        try:
+            stream.execute(query.code, query.params)
+            while True:
+                rows = stream.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows], [row[1] for row in rows]
+        finally:
+            stream.close()
+
+    # ========== CONSTRUCTION ET MISE À JOUR ==========
+
+    @api.model
+    def rebuild(self, batch_size=2000):
+        """Reconstruit entièrement l'index (et le compacte). Retourne le nombre de tâches."""
+        np = _numpy()
+        name, embed = self._get_embedding()
+        with self._locked():
+            self.env.cr.execute("SELECT count(*) FROM task_manager_task WHERE active")
+            capacity = max(1024, self.env.cr.fetchone()[0])
+            vectors = ids = None
+            count = 0
+            for batch_ids, texts in self._iter_texts(batch_size=batch_size):
+                embedded = np.asarray(embed(texts), dtype=np.float32)
+                if vectors is None:
+                    vectors, ids = self._allocate(capacity, embedded.shape[1])
+                elif count + len(batch_ids) > len(ids):
+                    vectors, ids = self._allocate(2 * (count + len(batch_ids)), vectors.shape[1], vectors, ids, count)
+                vectors[count:count + len(batch_ids)] = embedded
+                ids[count:count + len(batch_ids)] = batch_ids
+                count += len(batch_ids)
+            if vectors is None:
+                dim = np.asarray(embed(['']), dtype=np.float32).shape[1]
+                vectors, ids = self._allocate(capacity, dim)
+            vectors.flush()
+            ids.flush()
+            self._write_meta({'count': count, 'dim': vectors.shape[1], 'embedding': name})
+        _logger.info(f"Index sémantique reconstruit : {count} tâches")
+        return count
+
+    @api.model
+    def _schedule_update(self, task_ids):
+        """Met à jour l'index pour ces tâches après validation de la transaction"""
+        if not task_ids or not self._read_meta():
+            return
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.get('task_manager.semantic_ids')
+        if pending is None:
+            pending = postcommit.data['task_manager.semantic_ids'] = set()
+            registry = self.env.registry
+
+            @postcommit.add
+            def update_index():
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    try:
+                        env['task.manager.semantic.index']._update(pending)
+                    except Exception:
+                        _logger.exception("Mise à jour de l'index sémantique impossible")
+
+        pending.update(task_ids)
+
+    @api.model
+    def _update(self, task_ids):
+        """Réécrit, ajoute ou libère les lignes de ces tâches (supprimées ou archivées)"""
+        np = _numpy()
+        name, embed = self._get_embedding()
+        texts = {}
+        for batch_ids, batch_texts in self._iter_texts(task_ids):
+            texts.update(zip(batch_ids, batch_texts))
+
+        with self._locked():
+            meta = self._read_meta()
+            if not meta or meta['embedding'] != name:
+                _logger.warning("Index sémantique absent ou construit avec une autre fonction : reconstruction nécessaire")
+                return
+            vectors, ids = self._open(writable=True)
+            count = meta['count']
+            wanted = np.fromiter(task_ids, dtype=np.int32)
+            rows = np.flatnonzero(np.isin(ids[:count], wanted))
+
+            # Lignes libérées : tâches supprimées ou archivées
+            stale = rows[~np.isin(ids[rows], np.fromiter(texts, dtype=np.int32))]
+            ids[stale] = 0
+            vectors[stale] = 0.0
+
+            if texts:
+                order = list(texts)
+                embedded = np.asarray(embed([texts[tid] for tid in order]), dtype=np.float32)
+                position = {int(ids[row]): row for row in rows if ids[row]}
+                new = [i for i, tid in enumerate(order) if tid not in position]
+                if count + len(new) > len(ids):
+                    vectors, ids = self._allocate(2 * (count + len(new)), meta['dim'], vectors, ids, count)
+                targets = np.array([position.get(tid, -1) for tid in order])
+                targets[new] = np.arange(count, count + len(new))
+                vectors[targets] = embedded
+                ids[targets] = order
+                count += len(new)
+            vectors.flush()
+            ids.flush()
+            self._write_meta(dict(meta, count=count))
+
+    # ========== RECHERCHE ==========
+
+    @api.model
+    def search_semantic(self, query, k=20):
+        """
+        Les k tâches les plus proches de `query` (similarité cosinus),
+        filtrées par les droits d'accès : liste de (tâche, score).
+        """
+        np = _numpy()
+        meta = self._read_meta()
+        if not meta:
+            raise UserError("❌ L'index sémantique n'est pas construit : odoo-bin task_semantic_index -d <base>")
+        name, embed = self._get_embedding()
+        if meta['embedding'] != name:
+            raise UserError("❌ La fonction de plongement a changé : reconstruisez l'index sémantique")
+        if not meta['count'] or not query:
+            return []
+
+        vectors, ids = self._open()
+        # Pendant une reconstruction, meta.json peut précéder les nouveaux fichiers
+        count = min(meta['count'], len(ids))
+        target = np.asarray(embed([query]), dtype=np.float32)[0]
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SEARCH_CHUNK):
+            stop = min(start + _SEARCH_CHUNK, count)
+            scores[start:stop] = vectors[start:stop] @ target
+        scores[ids[:count] == 0] = -np.inf
+
+        # Marge pour les tâches filtrées par les règles d'accès
+        candidates = min(count, 2 * k)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+        ranked = [(int(ids[row]), float(scores[row])) for row in top if ids[row]]
+
+        Task = self.env['task.manager.task']
+        visible = set(Task.search([('id', 'in', [tid for tid, score in ranked])]).ids)
+        return [(Task.browse(tid), score) for tid, score in ranked if tid in visible][:k]
+
+
+class TaskManagerSemanticSearch(models.TransientModel):
+    """Assistant de recherche sémantique des tâches"""
+    _name = 'task.manager.semantic.search'
+    _description = 'Task Manager - Recherche sémantique'
+
+    query = fields.Char(string='Recherche', required=True)
+
+    limit = fields.Integer(string='Nombre de résultats', default=20)
+
+    line_ids = fields.One2many(
+        'task.manager.semantic.search.line',
+        'search_id',
+        string='Résultats'
+    )
+
+    def action_search(self):
+        self.ensure_one()
+        results = self.env['task.manager.semantic.index'].search_semantic(self.query, self.limit)
+        self.line_ids = [(5, 0, 0)] + [(0, 0, {
+            'sequence': rank,
+            'task_id': task.id,
+            'score': score,
+        }) for rank, (task, score) in enumerate(results)]
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
+class TaskManagerSemanticSearchLine(models.TransientModel):
+    _name = 'task.manager.semantic.search.line'
+    _description = 'Task Manager - Résultat de recherche sémantique'
+    _order = 'sequence'
+
+    search_id = fields.Many2one('task.manager.semantic.search', required=True, ondelete='cascade')
+
+    sequence = fields.Integer()
+
+    task_id = fields.Many2one('task.manager.task', string='Tâche', required=True, ondelete='cascade')
+
+    score = fields.Float(string='Similarité', digits=(3, 3))
+
+    state = fields.Selection(related='task_id.state')
+
+    team_member_id = fields.Many2one(related='task_id.team_member_id')
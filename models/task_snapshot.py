@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Champs suivis (tracking) rejoués par la reconstruction de l'historique
+_TRACKED_FIELDS = ('state', 'priority', 'team_member_id')
+
+
+class TaskManagerTaskSnapshot(models.Model):
+    """
+    Instantanés quotidiens des tâches pour les burndowns et la vélocité.
+
+    Une ligne par (jour, état, priorité, membre, en retard) avec le nombre de
+    tâches et le total d'heures estimées, ajoutée chaque nuit par cron.
+    """
+    _name = 'task.manager.task.snapshot'
+    _description = 'Task Manager - Instantané quotidien'
+    _log_access = False
+    _order = 'snapshot_date desc'
+
+    snapshot_date = fields.Date(string='Jour', required=True, readonly=True, index=True)
+
+    state = fields.Selection(
+        selection=lambda self: self.env['task.manager.task']._fields['state'].selection,
+        string='État',
+        readonly=True
+    )
+
+    priority = fields.Selection(
+        selection=lambda self: self.env['task.manager.task']._fields['priority'].selection,
+        string='Priorité',
+        readonly=True
+    )
+
+    team_member_id = fields.Many2one(
+        'task.manager.team.member',
+        string='Membre d\'équipe',
+        ondelete='set null',
+        readonly=True
+    )
+
+    is_overdue = fields.Boolean(string='En retard', readonly=True)
+
+    task_count = fields.Integer(string='Nombre de tâches', readonly=True)
+
+    estimated_hours = fields.Float(string='Heures estimées', readonly=True)
+
+    # ========== INSTANTANÉ DU JOUR ==========
+
+    @api.model
+    def _cron_take_snapshot(self):
+        """Ajoute l'instantané du jour (idempotent : remplace celui déjà pris)"""
+        self.env['task.manager.task'].flush_model()
+        today = fields.Date.context_today(self)
+        self.env.cr.execute(SQL("DELETE FROM task_manager_task_snapshot WHERE snapshot_date = %s", today))
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO task_manager_task_snapshot
+                   (snapshot_date, state, priority, team_member_id, is_overdue, task_count, estimated_hours)
+            SELECT %(today)s, state, priority, team_member_id,
+                   (COALESCE(deadline < %(today)s, FALSE) AND state != 'done'), COUNT(*), COALESCE(SUM(estimated_hours), 0)
+              FROM task_manager_task
+             WHERE active
+             GROUP BY 2, 3, 4, 5
+            """,
+            today=today,
+        ))
+        self.invalidate_model()
+        return True
+
+    # ========== RECONSTRUCTION DE L'HISTORIQUE ==========
+
+    @api.model
+    def _backfill(self, batch_size=10000):
+        """
+        Reconstruit les instantanés passés (jusqu'à hier) depuis mail.tracking.value.
+
+        Les valeurs initiales de chaque tâche sont déduites de la première
+        modification suivie ; les modifications sont ensuite lues dans l'ordre
+        chronologique par un curseur serveur, en un seul passage, en tenant
+        des compteurs par clé. Les heures estimées (non suivies) sont les
+        valeurs actuelles. Retourne le nombre de lignes écrites.
+        """
+        Task = self.env['task.manager.task']
+        Task.flush_model()
+        cr = self.env.cr
+        today = fields.Date.context_today(self)
+
+        cr.execute("""
+            SELECT id, create_date::date, state, priority, team_member_id, estimated_hours, deadline
+              FROM task_manager_task
+             WHERE active AND create_date IS NOT NULL
+        """)
+        tasks = {row[0]: row[1:] for row in cr.fetchall()}
+        if not tasks:
+            return 0
+
+        cr.execute("SELECT id FROM task_manager_team_member")
+        member_ids = {row[0] for row in cr.fetchall()}
+        field_ids = {
+            self.env['ir.model.fields']._get(Task._name, name).id: name for name in _TRACKED_FIELDS
+        }
+        # Le suivi enregistre le libellé des sélections : on revient à la clé
+        labels = {
+            name: {label: key for key, label in Task._fields[name]._description_selection(self.env)}
+            for name in ('state', 'priority')
+        }
+
+        def decode(name, value_char, value_integer):
+            if name == 'team_member_id':
+                return value_integer if value_integer in member_ids else None
+            return labels[name].get(value_char, value_char)
+
+        # Valeurs actuelles, remplacées par l'ancienne valeur de la première modification
+        initial = {tid: {'state': row[1], 'priority': row[2], 'team_member_id': row[3]}
+                   for tid, row in tasks.items()}
+        cr.execute(SQL(
+            """
+            SELECT DISTINCT ON (m.res_id, v.field_id)
+                   m.res_id, v.field_id, v.old_value_char, v.old_value_integer
+              FROM mail_tracking_value v
+              JOIN mail_message m ON m.id = v.mail_message_id
+             WHERE m.model = %s AND v.field_id = ANY(%s)
+             ORDER BY m.res_id, v.field_id, m.date, v.id
+            """,
+            Task._name, list(field_ids),
+        ))
+        for res_id, field_id, value_char, value_integer in cr.fetchall():
+            if res_id in initial:
+                name = field_ids[field_id]
+                initial[res_id][name] = decode(name, value_char, value_integer)
+
+        creations = defaultdict(list)
+        becoming_overdue = defaultdict(list)
+        for tid, (create_day, state, priority, member_id, hours, deadline) in tasks.items():
+            creations[create_day].append(tid)
+            if deadline:
+                becoming_overdue[deadline + timedelta(days=1)].append(tid)
+
+        first_day = min(creations)
+        cr.execute(SQL(
+            "DELETE FROM task_manager_task_snapshot WHERE snapshot_date >= %s AND snapshot_date < %s",
+            first_day, today,
+        ))
+
+        current = {}
+        counters = defaultdict(lambda: [0, 0.0])
+        buffer = []
+        written = 0
+
+        def move(tid, day, sign):
+            values = current[tid]
+            deadline = tasks[tid][5]
+            overdue = bool(deadline and deadline < day and values['state'] != 'done')
+            key = (values['state'], values['priority'], values['team_member_id'], overdue)
+            counters[key][0] += sign
+            counters[key][1] += sign * (tasks[tid][4] or 0.0)
+
+        changes = SQL(
+            """
+            SELECT m.res_id, m.date::date, v.field_id, v.new_value_char, v.new_value_integer
+              FROM mail_tracking_value v
+              JOIN mail_message m ON m.id = v.mail_message_id
+             WHERE m.model = %s AND v.field_id = ANY(%s)
+             ORDER BY m.date, v.id
+            """,
+            Task._name, list(field_ids),
+        )
+        # Curseur serveur : les modifications sont lues par lots, jamais toutes en mémoire
+        stream = cr._cnx.cursor(name='task_snapshot_backfill')
+        stream.itersize = batch_size
+        stream.execute(changes.code, changes.params)
+        rows = iter(stream)
+        change = next(rows, None)
+
+        day = first_day
+        while day < today:
+            for tid in becoming_overdue.pop(day, ()):
+                if tid in current:
+                    move(tid, day - timedelta(days=1), -1)
+                    move(tid, day, 1)
+            for tid in creations.pop(day, ()):
+                current[tid] = dict(initial[tid])
+                move(tid, day, 1)
+            while change and change[1] <= day:
+                res_id, change_day, field_id, value_char, value_integer = change
+                if res_id in current:
+                    move(res_id, day, -1)
+                    name = field_ids[field_id]
+                    current[res_id][name] = decode(name, value_char, value_integer)
+                    move(res_id, day, 1)
+                change = next(rows, None)
+
+            buffer.extend(
+                (day,) + key + tuple(values) for key, values in counters.items() if values[0] > 0
+            )
+            if len(buffer) >= batch_size:
+                written += self._insert_rows(buffer)
+                buffer = []
+            day += timedelta(days=1)
+
+        stream.close()
+        written += self._insert_rows(buffer)
+        self.invalidate_model()
+        _logger.info(f"Historique des instantanés reconstruit : {written} lignes depuis {first_day}")
+        return written
+
+    @api.model
+    def _insert_rows(self, rows):
+        if not rows:
+            return 0
+        columns = [list(column) for column in zip(*rows)]
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO task_manager_task_snapshot
+                   (snapshot_date, state, priority, team_member_id, is_overdue, task_count, estimated_hours)
+            SELECT * FROM unnest(%s::date[], %s::varchar[], %s::varchar[], %s::int[],
+                                 %s::bool[], %s::int[], %s::float8[])
+            """,
+            *columns,
+        ))
+        return len(rows)
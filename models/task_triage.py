@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from odoo import models, api
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Bornes de la taille adaptative des lots
+MIN_BATCH = 5
+MAX_BATCH = 100
+
+
+class TaskManagerTriage(models.AbstractModel):
+    """
+    Tri IA par lots des tâches créées depuis les emails entrants.
+
+    Les tâches arrivent en état de tri 'pending' ; le cron les prend par
+    micro-lots (FOR UPDATE SKIP LOCKED) et envoie un seul prompt JSON par
+    lot pour fixer priorité, durée estimée et rôle requis. La taille du lot
+    s'adapte à la latence du fournisseur (task_manager.ai_triage_batch_size) :
+    divisée par deux si l'appel dépasse la cible ou échoue, augmentée si le
+    fournisseur répond vite et qu'il reste du travail.
+    """
+    _name = 'task.manager.triage'
+    _description = 'Task Manager - Tri IA des emails entrants'
+
+    @api.model
+    def _cron_triage(self):
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if IrConfigParam.get_param('task_manager.ai_enabled', 'True') != 'True':
+            return True
+        target_latency = float(IrConfigParam.get_param('task_manager.ai_triage_target_latency', '10'))
+        time_budget = float(IrConfigParam.get_param('task_manager.ai_triage_time_budget', '50'))
+        started = time.monotonic()
+
+        while time.monotonic() - started < time_budget:
+            # Quota quotidien commun à toutes les actions IA : le reste attend demain
+            try:
+                self.env['task.ai.config'].check_daily_limit()
+            except UserError:
+                _logger.info("Tri IA suspendu : limite quotidienne d'appels atteinte")
+                break
+            batch_size = int(IrConfigParam.get_param('task_manager.ai_triage_batch_size', '20'))
+            tasks = self._claim_batch(batch_size)
+            if not tasks:
+                break
+            call_started = time.monotonic()
+            try:
+                self._triage_batch(tasks)
+                latency = time.monotonic() - call_started
+            except Exception as e:
+                # Fournisseur lent ou indisponible : lot suivant plus petit, au prochain passage
+                _logger.warning(f"Tri IA de {len(tasks)} tâches échoué : {e}")
+                self.env.cr.rollback()
+                self._set_batch_size(max(MIN_BATCH, batch_size // 2))
+                self.env.cr.commit()
+                break
+
+            if latency > target_latency:
+                self._set_batch_size(max(MIN_BATCH, batch_size // 2))
+            elif latency < target_latency / 2 and len(tasks) == batch_size:
+                self._set_batch_size(min(MAX_BATCH, batch_size + max(1, batch_size // 2)))
+            self.env.cr.commit()
+        return True
+
+    @api.model
+    def _set_batch_size(self, size):
+        self.env['ir.config_parameter'].sudo().set_param('task_manager.ai_triage_batch_size', str(size))
+
+    @api.model
+    def _claim_batch(self, batch_size):
+        """Verrouille les plus anciennes tâches en attente (celles déjà prises sont sautées)"""
+        Task = self.env['task.manager.task']
+        Task.flush_model(['ai_triage_state'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT id FROM task_manager_task
+             WHERE ai_triage_state = 'pending'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            batch_size,
+        ))
+        return Task.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _triage_batch(self, tasks):
+        Task = self.env['task.manager.task'].with_context(task_manager_ai_write=True)
+        ai_config = self.env['task.ai.config']
+        config = ai_config.get_config()
+        roles = dict(self.env['task.manager.team.member']._fields['role'].selection)
+
+        items = [{
+            'id': task.id,
+            'titre': task.name,
+            'description': (task.description or '')[:1000],
+        } for task in tasks]
+        prompt = f"""Tu tries des tâches créées depuis des emails de support.
+Pour chaque tâche, donne :
+- priority : low, medium ou high
+- estimated_hours : durée estimée en heures (nombre)
+- required_role : un de {', '.join(roles)}
+Tâches (JSON) :
+{json.dumps(items, ensure_ascii=False)}
+Réponds uniquement par un tableau JSON d'objets {{"id", "priority", "estimated_hours", "required_role"}}, sans texte autour."""
+
+        # Un appel pour tout le lot : journalisé sans tâche, pour ne pas lui
+        # attribuer les tokens et le compteur de suggestions du lot entier
+        start_time = time.time()
+        try:
+            response, tokens = Task._call_ai(prompt, config, 'triage')
+        except Exception as e:
+            # Le cron annule la transaction du lot : l'échec est journalisé à part
+            with self.env.registry.cursor() as cr:
+                self.env(cr=cr)['task.ai.history'].create_log(
+                    task_id=False,
+                    generation_type='triage',
+                    prompt=prompt,
+                    success=False,
+                    error=str(e),
+                    exec_time=time.time() - start_time,
+                    model=config.get('model'),
+                    provider_error=config.get('provider_error', False),
+                )
+            raise
+
+        # Réponse illisible : les tâches du lot passent en échec plutôt que d'être retentées sans fin
+        match = re.search(r'\[.*\]', response, re.DOTALL)
+        try:
+            entries = json.loads(match.group(0)) if match else None
+        except ValueError:
+            entries = None
+        if not isinstance(entries, list):
+            entries = None
+        self.env['task.ai.history'].create_log(
+            task_id=False,
+            generation_type='triage',
+            prompt=prompt,
+            response=response,
+            success=entries is not None,
+            error=None if entries is not None else "Réponse JSON illisible",
+            tokens=tokens,
+            exec_time=time.time() - start_time,
+            model=config['model'],
+        )
+        results = {}
+        for entry in entries or []:
+            if isinstance(entry, dict) and entry.get('id') in tasks.ids:
+                results[entry['id']] = entry
+
+        # Une écriture par combinaison de valeurs, pas une par tâche
+        groups = defaultdict(list)
+        for task in tasks:
+            entry = results.get(task.id)
+            if not entry:
+                groups[(('ai_triage_state', 'failed'),)].append(task.id)
+                continue
+            values = {'ai_triage_state': 'done'}
+            if entry.get('priority') in ('low', 'medium', 'high'):
+                values['priority'] = entry['priority']
+            try:
+                hours = float(entry.get('estimated_hours') or 0)
+            except (TypeError, ValueError):
+                hours = 0
+            if 0 < hours <= 1000:
+                values['estimated_hours'] = hours
+            if entry.get('required_role') in roles:
+                values['required_role'] = entry['required_role']
+            groups[tuple(sorted(values.items()))].append(task.id)
+        for values, task_ids in groups.items():
+            Task.browse(task_ids).write(dict(values))
+
+        IrConfigParam = self.env['ir.config_parameter'].sudo()
+        if IrConfigParam.get_param('task_manager.auto_assign_on_create', 'False') == 'True':
+            triaged = tasks.filtered(lambda task: task.ai_triage_state == 'done' and not task.team_member_id)
+            self.env['task.manager.assignment'].assign_tasks(triaged)
+        _logger.info(f"Tri IA : {len(results)}/{len(tasks)} tâches triées en un appel")
@@ -101,18 +101,77 @@ class TaskManagerTeamMember(models.Model):
         store=True
     )
     
+    open_task_count = fields.Integer(
+        string='Tâches ouvertes',
+        compute='_compute_task_counts',
+        store=True
+    )
+    
+    open_estimated_hours = fields.Float(
+        string='Charge restante (h)',
+        compute='_compute_task_counts',
+        store=True,
+        help="Somme des heures estimées des tâches non terminées"
+    )
+    
+    daily_capacity_hours = fields.Float(
+        string='Capacité (h/jour)',
+        default=8.0,
+        help="Nombre d'heures de travail disponibles par jour"
+    )
+    
+    workload_days = fields.Float(
+        string='Charge (jours)',
+        compute='_compute_workload_days',
+        help="Charge restante rapportée à la capacité journalière"
+    )
+    
+    # Lectures incrémentales de l'API, ordonnées par (write_date, id)
+    _write_date_id_idx = models.Index("(write_date, id)")
+    
     # ========== MÉTHODES DE CALCUL ==========
     @api.depends('task_ids')
     def _compute_task_count(self):
+        counts = self._read_task_aggregates()
         for member in self:
-            member.task_count = len(member.task_ids)
+            member.task_count = sum(count for count, hours in counts.get(member.id, {}).values())
     
-    @api.depends('task_ids.state')
+    @api.depends('task_ids.state', 'task_ids.estimated_hours')
     def _compute_task_counts(self):
+        """Agrège les tâches en une seule requête pour tous les membres recalculés"""
+        counts = self._read_task_aggregates()
         for member in self:
-            member.task_new_count = len(member.task_ids.filtered(lambda t: t.state == 'new'))
-            member.task_in_progress_count = len(member.task_ids.filtered(lambda t: t.state == 'in_progress'))
-            member.task_done_count = len(member.task_ids.filtered(lambda t: t.state == 'done'))
+            by_state = counts.get(member.id, {})
+            member.task_new_count = by_state.get('new', (0, 0.0))[0]
+            member.task_in_progress_count = by_state.get('in_progress', (0, 0.0))[0]
+            member.task_done_count = by_state.get('done', (0, 0.0))[0]
+            member.open_task_count = member.task_new_count + member.task_in_progress_count
+            member.open_estimated_hours = sum(
+                hours for state, (count, hours) in by_state.items() if state != 'done'
+            )
+    
+    def _read_task_aggregates(self):
+        """Retourne {member_id: {state: (nombre, heures estimées)}}"""
+        member_ids = [mid for mid in self.ids if mid]
+        if not member_ids:
+            return {}
+        groups = self.env['task.manager.task']._read_group(
+            [('team_member_id', 'in', member_ids)],
+            ['team_member_id', 'state'],
+            ['__count', 'estimated_hours:sum'],
+        )
+        result = {}
+        for member, state, count, hours in groups:
+            result.setdefault(member.id, {})[state] = (count, hours or 0.0)
+        return result
+    
+    @api.depends('open_estimated_hours', 'daily_capacity_hours')
+    def _compute_workload_days(self):
+        for member in self:
+            if member.daily_capacity_hours > 0:
+                member.workload_days = member.open_estimated_hours / member.daily_capacity_hours
+            else:
+                member.workload_days = 0.0
     
     @api.depends('task_count', 'task_done_count')
     def _compute_completion_rate(self):
@@ -132,6 +191,18 @@ class TaskManagerTeamMember(models.Model):
                 if not re.match(email_regex, member.email):
                     raise ValidationError("Format d'email invalide. Exemple: nom@exemple.com")
     
+    # ========== MODIFICATION ==========
+    def write(self, vals):
+        res = super().write(vals)
+        if 'daily_capacity_hours' in vals:
+            self.env['task.manager.scheduler'].recompute_from(self.task_ids.ids)
+        return res
+    
+    def unlink(self):
+        # Passer par write() pour que les agrégats des tâches suivent
+        self.task_ids.write({'team_member_id': False})
+        return super().unlink()
+    
     # ========== ACTIONS ==========
     def action_view_tasks(self):
         """Ouvre la vue avec toutes les tâches du membre"""
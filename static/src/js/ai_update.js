@@ -0,0 +1,42 @@
+/** @odoo-module **/
+
+import { FormController } from "@web/views/form/form_controller";
+import { patch } from "@web/core/utils/patch";
+import { onWillUnmount } from "@odoo/owl";
+
+/**
+ * Applique sur place les résultats des actions IA envoyés par le serveur
+ * (notification bus "task_manager.ai_update"), au lieu de recharger tout
+ * le client web : seuls les champs modifiés sont mis à jour dans le
+ * formulaire ouvert.
+ */
+patch(FormController.prototype, {
+    setup() {
+        super.setup(...arguments);
+        if (this.props.resModel !== "task.manager.task") {
+            return;
+        }
+        const busService = this.env.services.bus_service;
+        const onAiUpdate = (payload) => this.onTaskAiUpdate(payload);
+        busService.subscribe("task_manager.ai_update", onAiUpdate);
+        onWillUnmount(() => busService.unsubscribe("task_manager.ai_update", onAiUpdate));
+    },
+
+    async onTaskAiUpdate({ model, id, values, reload }) {
+        const record = this.model.root;
+        if (model !== this.props.resModel || record.resId !== id) {
+            return;
+        }
+        if (reload) {
+            // Relation modifiée (sous-tâches créées) : on relit uniquement cet enregistrement
+            await record.load();
+            return;
+        }
+        if (record.dirty) {
+            // Ne pas écraser une saisie en cours
+            return;
+        }
+        delete values.id;
+        record._applyValues(values);
+    },
+});
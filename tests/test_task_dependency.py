@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTaskDependency(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Task = cls.env['task.manager.task']
+        cls.task_a = Task.create({'name': "Tâche A"})
+        cls.task_b = Task.create({'name': "Tâche B", 'depends_on_ids': [Command.link(cls.task_a.id)]})
+
+    def test_cycle_through_depends_on(self):
+        with self.assertRaises(ValidationError):
+            self.task_a.write({'depends_on_ids': [Command.link(self.task_b.id)]})
+
+    def test_cycle_through_blocking(self):
+        # B dépend de A : A ne peut pas être bloquée par B
+        with self.assertRaises(ValidationError):
+            self.task_b.write({'blocking_ids': [Command.link(self.task_a.id)]})
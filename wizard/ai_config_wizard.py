@@ -60,63 +60,10 @@ class AIConfigWizard(models.TransientModel):
         }
     
     def action_test_and_save(self):
-        """Teste la connexion puis enregistre si OK"""
+        """Enregistre puis lance les sondes de santé en arrière-plan"""
         self.ensure_one()
-        
-        # D'abord enregistrer temporairement
-        IrConfigParam = self.env['ir.config_parameter'].sudo()
-        IrConfigParam.set_param('task_manager.claude_api_key', self.api_key)
-        
-        # Tester
-        try:
-            import anthropic
-            client = anthropic.Anthropic(api_key=self.api_key)
-            
-            response = client.messages.create(
-                model=self.model_name,
-                max_tokens=50,
-                messages=[{
-                    "role": "user",
-                    "content": "Réponds juste : Configuration OK"
-                }]
-            )
-            
-            # Si succès, enregistrer tout
-            self.action_save_config()
-            
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': '✅ Test réussi !',
-                    'message': 'La connexion à l\'API fonctionne. Configuration enregistrée.',
-                    'type': 'success',
-                    'sticky': True,
-                }
-            }
-            
-        except Exception as e:
-            # Supprimer la clé temporaire en cas d'échec
-            IrConfigParam.set_param('task_manager.claude_api_key', '')
-            
-            error_msg = str(e)
-            if 'authentication' in error_msg.lower():
-                message = "Clé API invalide ou expirée"
-            elif 'quota' in error_msg.lower():
-                message = "Quota API dépassé"
-            else:
-                message = f"Erreur : {error_msg}"
-            
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': '❌ Test échoué',
-                    'message': message,
-                    'type': 'danger',
-                    'sticky': True,
-                }
-            }
+        self.action_save_config()
+        return self.env['task.ai.config'].test_connection()
 
 
 class TaskPriorityWizard(models.TransientModel):